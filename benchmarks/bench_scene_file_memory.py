@@ -0,0 +1,91 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compares the memory held by the SceneFile records of a scan with the dicts
+holding the live attribute and node wrappers the scans used before, on a
+synthetic scene.
+
+Needs python 3, for tracemalloc.
+
+Usage: python benchmarks/bench_scene_file_memory.py [item count]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import stand_in
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def get_live_records(ix, class_names):
+    """
+    The records as the breakdown built them before SceneFile.
+    """
+    records = []
+    for class_name in class_names:
+        objects = ix.api.OfObjectVector()
+        ix.application.get_matching_objects(objects, "*", class_name)
+        for obj in objects:
+            attr = obj.get_attribute("filename")
+            if attr:
+                records.append(
+                    {"attr": attr, "node": obj, "path": attr.get_string()}
+                )
+    return records
+
+
+def get_scene_files(scene_scan):
+    # the scan also keeps the objects bucketed by class, only the file
+    # records are kept so they are measured like the live ones
+    return scene_scan.scan_scene().object_files
+
+
+def measure(fn):
+    """
+    Returns what the given callable returns and the memory it holds on to.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(item_count):
+    ix = stand_in.install_ix(stand_in.build_scene(item_count))
+    scene_scan = stand_in.load_module("scene_scan")
+
+    (records, live_size) = measure(
+        lambda: get_live_records(ix, stand_in.FILE_CLASS_NAMES)
+    )
+    (scene_files, compact_size) = measure(lambda: get_scene_files(scene_scan))
+    assert len(scene_files) == len(records), "the scans found different files"
+
+    print("%d items, %d file records" % (item_count, len(records)))
+    print(
+        "dicts with live wrappers: %8.1f KiB (%d bytes per record)"
+        % (live_size / 1024.0, live_size // len(records))
+    )
+    print(
+        "SceneFile:                %8.1f KiB (%d bytes per record)"
+        % (compact_size / 1024.0, compact_size // len(scene_files))
+    )
+    print("ratio:                    %.1fx" % (float(live_size) / compact_size))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
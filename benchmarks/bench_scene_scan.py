@@ -0,0 +1,81 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compares the single pass scan_scene with the previous get_matching_objects
+loop, one query per file class plus a recursive walk of the contexts, on a
+synthetic scene.
+
+Usage: python benchmarks/bench_scene_scan.py [item count]
+"""
+
+import sys
+
+import stand_in
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def get_contexts(context, result=None):
+    if result is None:
+        result = []
+
+    result.append(context)
+    for i in range(context.get_context_count()):
+        get_contexts(context.get_context(i), result=result)
+
+    return result
+
+
+def scan_per_class(ix):
+    """
+    The scan as the breakdown and the publisher did it before scan_scene.
+    """
+    paths = []
+    for class_name in stand_in.FILE_CLASS_NAMES:
+        objects = ix.api.OfObjectVector()
+        ix.application.get_matching_objects(objects, "*", class_name)
+        for obj in objects:
+            attr = obj.get_attribute("filename")
+            if attr:
+                paths.append(attr.get_string())
+
+    for context in get_contexts(ix.get_item("project:/")):
+        attr = context.get_attribute("filename")
+        if attr:
+            paths.append(attr.get_string())
+
+    return paths
+
+
+def main(item_count):
+    ix = stand_in.install_ix(stand_in.build_scene(item_count))
+    scene_scan = stand_in.load_module("scene_scan")
+
+    expected = sorted(scan_per_class(ix))
+    found = sorted(scene_file.path for scene_file in scene_scan.scan_scene().files)
+    assert found == expected, "the scans found different paths"
+
+    per_class = stand_in.best_time(lambda: scan_per_class(ix))
+    single_pass = stand_in.best_time(scene_scan.scan_scene)
+
+    print("%d items, %d file paths" % (item_count, len(found)))
+    print(
+        "get_matching_objects per class: %.3fs (%d passes)"
+        % (per_class, len(stand_in.FILE_CLASS_NAMES) + 1)
+    )
+    print("scan_scene:                     %.3fs (1 pass)" % single_pass)
+    print("speedup:                        %.1fx" % (per_class / single_pass))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,125 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compares TemplatePathFilter, all the templates in a single regular
+expression, with matching each path against one template at a time like
+template_from_path does, on synthetic paths.
+
+Usage: python benchmarks/bench_template_filter.py [path count]
+"""
+
+import re
+import sys
+
+import stand_in
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+PROJECT_ROOT = "/jobs/show"
+
+DEFINITIONS = (
+    "assets/{sg_asset_type}/{Asset}/{Step}/work/clarisse/{name}.v{version}.project",
+    "assets/{sg_asset_type}/{Asset}/{Step}/publish/clarisse/{name}.v{version}.project",
+    "assets/{sg_asset_type}/{Asset}/{Step}/publish/textures/{name}.{UDIM}.v{version}.exr",
+    "assets/{sg_asset_type}/{Asset}/{Step}/publish/alembic/{name}.v{version}.abc",
+    "assets/{sg_asset_type}/{Asset}/{Step}/publish/usd/{name}.v{version}.usd",
+    "sequences/{Sequence}/{Shot}/{Step}/work/clarisse/{name}.v{version}.project",
+    "sequences/{Sequence}/{Shot}/{Step}/publish/clarisse/{name}.v{version}.project",
+    "sequences/{Sequence}/{Shot}/{Step}/publish/alembic/{name}.v{version}.abc",
+    "sequences/{Sequence}/{Shot}/{Step}/publish/renders/{name}/v{version}/"
+    "{Shot}_{name}_v{version}[.{AOV}].{SEQ}.exr",
+    "sequences/{Sequence}/{Shot}/{Step}/work/images/{name}/v{version}/"
+    "{Shot}_{name}_v{version}.{SEQ}.exr",
+)
+
+
+def make_paths(path_count):
+    """
+    Returns synthetic paths, three out of four matching one of the templates.
+    """
+    paths = []
+    for i in range(path_count):
+        version = "%03d" % (i % 40)
+        if i % 2:
+            paths.append(
+                "%s/sequences/sq%02d/sh%04d/light/publish/renders/beauty/v%s/"
+                "sh%04d_beauty_v%s.%04d.exr"
+                % (PROJECT_ROOT, i % 20, i % 800, version, i % 800, version, i % 100)
+            )
+        elif i % 4:
+            paths.append(
+                "%s/assets/prop/asset_%d/surface/publish/textures/"
+                "diffuse.1001.v%s.exr" % (PROJECT_ROOT, i % 500, version)
+            )
+        else:
+            paths.append(
+                "/lib/textures/library_%d/diffuse_%d.exr" % (i % 50, i)
+            )
+    return paths
+
+
+def filter_per_template(template_filter, templates, paths):
+    """
+    Matches every path against one template at a time.
+    """
+    regexes = []
+    for template in templates:
+        regexes.append(
+            re.compile(
+                re.escape(template.root_path)
+                + "/"
+                + template_filter._definition_to_regex(template.definition)
+                + r"\Z"
+            )
+        )
+
+    result = []
+    for path in paths:
+        for regex in regexes:
+            if regex.match(path):
+                result.append(path)
+                break
+    return result
+
+
+def main(path_count):
+    stand_in.install_sgtk()
+    template_filter = stand_in.load_module("template_filter")
+
+    templates = [
+        stand_in.TemplatePath(PROJECT_ROOT, definition)
+        for definition in DEFINITIONS
+    ]
+    paths = make_paths(path_count)
+
+    path_filter = template_filter.TemplatePathFilter(templates)
+    expected = filter_per_template(template_filter, templates, paths)
+    assert path_filter.filter(paths) == expected, "the filters do not agree"
+
+    per_template = stand_in.best_time(
+        lambda: filter_per_template(template_filter, templates, paths)
+    )
+    single_regex = stand_in.best_time(lambda: path_filter.filter(paths))
+
+    print(
+        "%d paths, %d templates, %d matching"
+        % (path_count, len(templates), len(expected))
+    )
+    print("one template at a time: %.3fs" % per_template)
+    print("TemplatePathFilter:     %.3fs" % single_regex)
+    print("speedup:                %.1fx" % (per_template / single_regex))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,261 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Stand-ins for the Clarisse python api, with a synthetic scene, and for the
+templates of toolkit, so the modules of tk_clarisse that only depend on those
+can be benchmarked outside of Clarisse and without toolkit.
+"""
+
+import os
+import sys
+import time
+import types
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+PACKAGE_FOLDER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "python", "tk_clarisse"
+)
+
+# classes of the objects of the synthetic scene, the ones with a filename
+# attribute first
+FILE_CLASS_NAMES = (
+    "GeometryPolyfile",
+    "GeometryFurFile",
+    "GeometryVolumeFile",
+    "GeometryBundleAlembic",
+    "GeometryBundleUsd",
+    "ProcessAlembicExport",
+    "LightPhysicalSphere",
+    "TextureMapFile",
+    "TextureStreamedMapFile",
+    "TextureOslFile",
+)
+OTHER_CLASS_NAMES = (
+    "MaterialPhysicalStandard",
+    "GeometrySphere",
+    "LightPhysicalDistant",
+    "TextureMultiply",
+)
+
+
+class Attribute(object):
+    def __init__(self, item, name, value):
+        self._item = item
+        self._name = name
+        self._value = value
+
+    def get_name(self):
+        return self._name
+
+    def get_string(self):
+        return self._value
+
+    def set_string(self, value):
+        self._value = value
+
+    def get_parent_object(self):
+        return self._item
+
+
+class Item(object):
+    """
+    An object or context of the stand-in scene.
+    """
+
+    def __init__(self, full_name, class_name, attributes=None):
+        self._full_name = full_name
+        self._class_name = class_name
+        self._attributes = {}
+        for name, value in (attributes or {}).items():
+            self._attributes[name] = Attribute(self, name, value)
+
+    def get_full_name(self):
+        return self._full_name
+
+    def get_class_name(self):
+        return self._class_name
+
+    def is_kindof(self, class_name):
+        return self._class_name == class_name
+
+    def is_context(self):
+        return False
+
+    def get_attribute(self, name):
+        # Clarisse returns a new wrapper every time
+        attr = self._attributes.get(name)
+        if attr is None:
+            return None
+        return Attribute(self, name, attr.get_string())
+
+
+class Context(Item):
+    def __init__(self, full_name, attributes=None):
+        super(Context, self).__init__(full_name, "OfContext", attributes)
+        self.contexts = []
+        self.objects = []
+
+    def is_context(self):
+        return True
+
+    def is_reference(self):
+        return "filename" in self._attributes
+
+    def get_context_count(self):
+        return len(self.contexts)
+
+    def get_context(self, index):
+        return self.contexts[index]
+
+    def get_object_count(self):
+        return len(self.objects)
+
+    def get_object(self, index):
+        return self.objects[index]
+
+
+class Application(object):
+    def __init__(self, root):
+        self._root = root
+
+    def get_matching_objects(self, result, pattern, class_name):
+        """
+        Like Clarisse, goes through the whole project for every call.
+        """
+        stack = [self._root]
+        while stack:
+            context = stack.pop()
+            for obj in context.objects:
+                if obj.is_kindof(class_name):
+                    result.append(obj)
+            stack.extend(context.contexts)
+
+
+def build_scene(item_count, objects_per_context=50, references_every=20):
+    """
+    Returns the root context of a synthetic scene with the given number of
+    objects, a third of them with a filename attribute.
+    """
+    class_names = FILE_CLASS_NAMES + OTHER_CLASS_NAMES * 5
+    root = Context("project:/")
+    context = None
+    for i in range(item_count):
+        if i % objects_per_context == 0:
+            index = i // objects_per_context
+            attributes = None
+            if index % references_every == 0:
+                attributes = {"filename": "/lib/assets/ref_%04d.project" % index}
+            context = Context(
+                "project://scene/context_%04d" % index, attributes
+            )
+            root.contexts.append(context)
+
+        class_name = class_names[i % len(class_names)]
+        attributes = None
+        if class_name in FILE_CLASS_NAMES:
+            attributes = {
+                "filename": "/jobs/show/assets/asset_%d/tex_%d.####.exr"
+                % (i % 500, i % 37)
+            }
+        context.objects.append(
+            Item(
+                "%s/%s_%d" % (context.get_full_name(), class_name, i),
+                class_name,
+                attributes,
+            )
+        )
+
+    return root
+
+
+def install_ix(root):
+    """
+    Installs a stand-in ix module for the given scene.
+    """
+    items = {"project:/": root}
+
+    def get_item(name):
+        if name not in items:
+            stack = [root]
+            while stack:
+                context = stack.pop()
+                items[context.get_full_name()] = context
+                for obj in context.objects:
+                    items[obj.get_full_name()] = obj
+                stack.extend(context.contexts)
+        return items[name]
+
+    ix = types.ModuleType("ix")
+    ix.application = Application(root)
+    ix.get_item = get_item
+    ix.item_exists = lambda name: items.get(name)
+    ix.api = types.ModuleType("ix.api")
+    ix.api.OfObjectVector = list
+    sys.modules["ix"] = ix
+    return ix
+
+
+class TemplatePath(object):
+    """
+    Stand-in for the path templates of toolkit.
+    """
+
+    def __init__(self, root_path, definition):
+        self.root_path = root_path
+        self.definition = definition
+
+
+def install_sgtk():
+    """
+    Installs a stand-in sgtk module, with just the path templates.
+    """
+    sgtk = types.ModuleType("sgtk")
+    sgtk.TemplatePath = TemplatePath
+    sys.modules["sgtk"] = sgtk
+    return sgtk
+
+
+def load_module(name):
+    """
+    Loads a module of tk_clarisse by itself, without the rest of the package,
+    which needs toolkit.
+    """
+    path = os.path.join(PACKAGE_FOLDER, "%s.py" % name)
+    try:
+        import importlib.util
+    except ImportError:
+        # python 2
+        import imp
+
+        return imp.load_source("tk_clarisse_%s" % name, path)
+
+    spec = importlib.util.spec_from_file_location("tk_clarisse_%s" % name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def best_time(fn, repeat=3):
+    """
+    Returns the best time out of a few runs of the given callable.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
@@ -15,9 +15,12 @@ import sys
 import time
 import re
 import inspect
+import json
 import logging
+import threading
 
 from functools import wraps, partial
+from collections import deque
 
 import tank
 import traceback
@@ -69,36 +72,193 @@ def show_info(msg):
     )
 
 
-def display_error(msg):
-    t = time.asctime(time.localtime())
+def display_error(msg, t=None):
+    t = t or time.asctime(time.localtime())
     print("%s - Shotgun Error | Clarisse engine | %s " % (t, msg))
     ix.application.log_error(
         "%s - Shotgun Error | Clarisse engine | %s " % (t, msg)
     )
 
 
-def display_warning(msg):
-    t = time.asctime(time.localtime())
+def display_warning(msg, t=None):
+    t = t or time.asctime(time.localtime())
     ix.application.log_warning(
         "%s - Shotgun Warning | Clarisse engine | %s " % (t, msg)
     )
 
 
-def display_info(msg):
-    t = time.asctime(time.localtime())
+def display_info(msg, t=None):
+    t = t or time.asctime(time.localtime())
     ix.application.log_info(
         "%s - Shotgun Info | Clarisse engine | %s " % (t, msg)
     )
 
 
-def display_debug(msg):
+def display_debug(msg, t=None):
     if os.environ.get("TK_DEBUG") == "1":
-        t = time.asctime(time.localtime())
+        t = t or time.asctime(time.localtime())
         ix.application.log_info(
             "%s - Shotgun Debug | Clarisse engine | %s " % (t, msg)
         )
 
 
+# formats of the toolkit messages shown in the Clarisse log:
+#     Shotgun <basename>: <message>
+# where "basename" is the leaf part of the logging record name,
+# for example "tk-multi-shotgunpanel" or "qt_importer".
+LOG_FORMATTER = logging.Formatter("Shotgun %(basename)s: %(message)s")
+DEBUG_LOG_FORMATTER = logging.Formatter(
+    "Debug: Shotgun %(basename)s: %(message)s"
+)
+
+
+def _display_repeated(message, repeats, t):
+    """
+    Displays a log message queued by the engine, along with the number of
+    times it was repeated.
+    """
+    (fct, msg) = message
+    if repeats:
+        msg = "%s (repeated %d times)" % (msg, repeats + 1)
+    fct(msg, t)
+
+
+def _cpu_time():
+    """
+    Returns the CPU time of the current thread in seconds, or None where that
+    is not available, ie. python 2.
+
+    The CPU time of the whole process is not used instead, as it includes the
+    time of every other thread.
+    """
+    if hasattr(time, "thread_time"):
+        return time.thread_time()
+    return None
+
+
+class _Span(object):
+    """
+    Context recording the wall-clock time spent in it, and the CPU time of
+    its thread where available, as a complete event of a :class:`Tracer`.
+    """
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start_cpu = _cpu_time()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        duration = time.time() - self.start
+        args = dict(self.args)
+        if self.start_cpu is not None:
+            args["cpu_ms"] = (_cpu_time() - self.start_cpu) * 1000
+        if exc_type is not None:
+            args["error"] = "%s: %s" % (exc_type.__name__, exc_value)
+
+        self.tracer.events.append(
+            {
+                "name": self.name,
+                "cat": self.category,
+                "ph": "X",
+                "ts": int(self.start * 1000000),
+                "dur": int(duration * 1000000),
+                "pid": os.getpid(),
+                "tid": threading.current_thread().ident,
+                "args": args,
+            }
+        )
+
+
+class _NullSpan(object):
+    """
+    Context doing nothing, used while tracing is disabled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """
+    Records nested spans of time, ie. the engine startup and context changes,
+    to be inspected as a Chrome trace (chrome://tracing or Perfetto).
+
+    Spans cost a single check while tracing is disabled. Only the latest
+    max_events spans are kept.
+    """
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+
+    def span(self, name, category="tk-clarisse", **args):
+        """
+        Returns a context recording the time spent in it.
+
+        :param str name: Name of the span.
+        :param str category: Category of the span in the trace.
+        :param args: Extra values shown along with the span.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def clear(self):
+        """
+        Forgets the recorded spans.
+        """
+        self.events.clear()
+
+    def save(self, path):
+        """
+        Saves the recorded spans as a Chrome trace JSON file.
+        """
+        # spans are recorded when they end, so parents come after children
+        events = sorted(self.events, key=lambda event: event["ts"])
+        with open(path, "w") as trace_file:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms"}, trace_file
+            )
+
+
+# the tracer is kept for the whole session, so it also covers restarts of the
+# engine. Set TK_CLARISSE_TRACE=1 to trace from startup.
+if not hasattr(ix.shotgun, "tracer"):
+    ix.shotgun.tracer = Tracer(os.environ.get("TK_CLARISSE_TRACE") == "1")
+
+
+def traced(name):
+    """
+    Decorator recording each call to the decorated function as a span of the
+    session tracer.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = ix.shotgun.tracer
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 # we use a trick with decorators to get some sort of event notification
 # when the scene is saved/loaded, etc... we could use a timer similar to
 # what tk-houdini uses but this other aproach is more generic
@@ -131,6 +291,15 @@ SCENE_EVENT_NAMES = (
     "load_startup_scene",
 )
 
+# events after which the scene contents are unknown to the engine
+SCENE_CHANGE_EVENT_NAMES = (
+    "new_project",
+    "clear_project",
+    "import_project",
+    "load_project",
+    "load_startup_scene",
+)
+
 SCENE_QUIT_EVENT_NAME = "quit"
 
 
@@ -145,17 +314,18 @@ class SceneEventWatcher(object):
     cleaned up after the first one has triggered
     """
 
-    def __init__(self, cb_fn, run_once=False):
+    def __init__(self, cb_fn, scene_events=SCENE_EVENT_NAMES, run_once=False):
         """
         Constructor.
 
         :param cb_fn: Callback to invoke everytime a scene event happens.
         :param scene_events: List of scene events to watch for. Defaults to 
-            new, open and save.
+            all the events in SCENE_EVENT_NAMES.
         :param run_once: If True, the watcher will notify only on the first 
             event. Defaults to False.
         """
         self.__cb_fn = cb_fn
+        self.__scene_events = scene_events
         self.__run_once = run_once
         self.__wrapped_fns = {}
 
@@ -170,7 +340,7 @@ class SceneEventWatcher(object):
         self.stop_watching()
 
         # now add callbacks to watch for some scene events:
-        for event_name in SCENE_EVENT_NAMES:
+        for event_name in self.__scene_events:
             try:
                 event_fn = getattr(ix.application, event_name)
                 event_fn = wrapped(
@@ -197,6 +367,20 @@ class SceneEventWatcher(object):
         self.__wrapped_fns[SCENE_QUIT_EVENT_NAME] = event_fn
         setattr(ix.application, SCENE_QUIT_EVENT_NAME, event_fn)
 
+    @property
+    def scene_events(self):
+        """
+        Names of the scene events watched.
+        """
+        return self.__scene_events
+
+    def notify(self):
+        """
+        Invokes the callback as if a watched scene event had happened, for
+        scene operations done without going through the watched functions.
+        """
+        SceneEventWatcher.__scene_event_callback(self)
+
     def stop_watching(self):
         """
         Stops watching the Clarisse scene.
@@ -227,6 +411,7 @@ class SceneEventWatcher(object):
 # for example if a non-tank file is loaded in clarisse
 
 
+@traced("refresh_engine")
 def refresh_engine(engine_name, prev_context, menu_name):
     """
     refresh the current engine
@@ -253,12 +438,13 @@ def refresh_engine(engine_name, prev_context, menu_name):
     # loading a scene file
     new_path = os.path.abspath(scene_name)
 
-    # this file could be in another project altogether, so create a new
-    # API instance.
+    # this file could be in another project altogether, so get its API
+    # instance and construct the new context for this path, reusing the
+    # ones of the work area if it was resolved before.
     try:
-        tk = tank.tank_from_path(new_path)
-        # and construct the new context for this path:
-        ctx = tk.context_from_path(new_path, prev_context)
+        (tk, ctx) = current_engine.context_cache.get_context(
+            new_path, prev_context, tk
+        )
     except tank.TankError:
         try:
             ctx = current_engine.sgtk.context_from_entity_dictionary(
@@ -377,6 +563,18 @@ class ClarisseEngine(Engine):
     Toolkit engine for Clarisse.
     """
 
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor.
+        """
+        # messages waiting to be shown in the Clarisse log, see
+        # _emit_log_message. Set before anything gets logged.
+        self.__log_messages = deque()
+        self.__log_flush_pending = False
+
+        with ix.shotgun.tracer.span("engine startup"):
+            super(ClarisseEngine, self).__init__(*args, **kwargs)
+
     def __get_platform_resource_path(self, filename):
         """
         Returns the full path to the given platform resource file or folder.
@@ -429,6 +627,103 @@ class ClarisseEngine(Engine):
                 },
             )
 
+    def __toggle_tracing(self):
+        """
+        Toggles the recording of spans in the session tracer, clearing the
+        ones recorded so far when starting again.
+        """
+        tracer = ix.shotgun.tracer
+        tracer.enabled = not tracer.enabled
+        if tracer.enabled:
+            tracer.clear()
+        self.logger.info(
+            "Performance tracing %s."
+            % ("enabled" if tracer.enabled else "disabled")
+        )
+
+    def __save_trace(self):
+        """
+        Saves the spans recorded by the session tracer as a Chrome trace.
+        """
+        tracer = ix.shotgun.tracer
+        if not tracer.events:
+            self.logger.warning(
+                "No performance trace recorded, enable it with Toggle "
+                "Performance Tracing or by setting TK_CLARISSE_TRACE=1."
+            )
+            return
+
+        path = os.path.join(
+            LogManager().log_folder,
+            "tk-clarisse-trace-%s.json" % time.strftime("%Y%m%d_%H%M%S"),
+        )
+        if self.has_ui:
+            from sgtk.platform.qt import QtGui
+
+            path = QtGui.QFileDialog.getSaveFileName(
+                None, "Save Performance Trace", path, "Chrome trace (*.json)"
+            )[0]
+            if not path:
+                return
+
+        tracer.save(path)
+        self.logger.info(
+            "Performance trace saved to '%s', open it in chrome://tracing."
+            % path
+        )
+
+    def __register_tracing_commands(self):
+        """
+        Registers the commands to record and save performance traces with
+        the engine's context menu.
+        """
+        self.register_command(
+            "Toggle Performance Tracing",
+            self.__toggle_tracing,
+            {"short_name": "toggle_tracing", "type": "context_menu"},
+        )
+        self.register_command(
+            "Save Performance Trace...",
+            self.__save_trace,
+            {
+                "short_name": "save_trace",
+                "description": (
+                    "Saves the recorded performance trace as Chrome trace "
+                    "JSON."
+                ),
+                "type": "context_menu",
+            },
+        )
+
+    def __refresh_scene_index(self):
+        """
+        Rebuilds the index of the items referencing files, to pick up the
+        edits done in the Clarisse UI, which it does not follow.
+        """
+        self._scene_index.rebuild()
+        self.logger.info(
+            "Scene file index refreshed, %d items reference files."
+            % len(self._scene_index.files)
+        )
+
+    def __register_scene_index_command(self):
+        """
+        Registers the command to refresh the scene file index with the
+        engine's context menu.
+        """
+        self.register_command(
+            "Refresh Scene File Index",
+            self.__refresh_scene_index,
+            {
+                "short_name": "refresh_scene_index",
+                "description": (
+                    "Scans the scene again for the files it references, to "
+                    "pick up the changes done in the Clarisse UI."
+                ),
+                "type": "context_menu",
+            },
+        )
+
     def __register_reload_command(self):
         """
         Registers a "Reload and Restart" command with the engine if any
@@ -488,6 +783,7 @@ class ClarisseEngine(Engine):
     ###########################################################################
     # init and destroy
 
+    @traced("pre_app_init")
     def pre_app_init(self):
         """
         Runs after the engine is set up but before any apps have been
@@ -502,6 +798,7 @@ class ClarisseEngine(Engine):
         QtCore.QTextCodec.setCodecForCStrings(utf8)
         self.logger.debug("set utf-8 codec for widget text")
 
+    @traced("init_engine")
     def init_engine(self):
         """
         Initializes the Clarisse engine.
@@ -581,6 +878,34 @@ class ClarisseEngine(Engine):
         # add qt paths and dlls
         self._init_pyside()
 
+        # keep an index of the items referencing files in the scene, so that
+        # apps like the breakdown or the publisher do not need to scan the
+        # whole scene every time. Note this watcher needs to be registered
+        # before the context switch one, as it outlives it.
+        tk_clarisse = self.import_module("tk_clarisse")
+        self._file_classes = tk_clarisse.load_file_classes(
+            self.cache_location, self.logger
+        )
+        self._scene_index = tk_clarisse.SceneFileIndex(
+            self.logger, file_classes=self._file_classes
+        )
+        self._published_file_cache = None
+        self._session_fingerprints = None
+        self._context_cache = tk_clarisse.ContextCache(self.logger)
+        self._scene_index.start_watching()
+        self.__scene_index_watcher = SceneEventWatcher(
+            self._scene_index.invalidate,
+            scene_events=SCENE_CHANGE_EVENT_NAMES,
+            run_once=False,
+        )
+
+        # the publish plugins checks on the session are kept until the
+        # session is saved, loaded or reset
+        self._validation_cache = tk_clarisse.ValidationCache()
+        self.__validation_cache_watcher = SceneEventWatcher(
+            self._validation_cache.invalidate, run_once=False
+        )
+
         # default menu name is Shotgun but this can be overriden
         # in the configuration to be Sgtk in case of conflicts
         self._menu_name = "Shotgun"
@@ -601,6 +926,7 @@ class ClarisseEngine(Engine):
             self.__watcher = SceneEventWatcher(cb_fn, run_once=False)
             self.logger.debug("Registered open and save callbacks.")
 
+    @traced("create_shotgun_menu")
     def create_shotgun_menu(self):
         """
         Creates the main shotgun menu in clarisse.
@@ -624,6 +950,7 @@ class ClarisseEngine(Engine):
 
         return False
 
+    @traced("_initialise_qapplication")
     def _initialise_qapplication(self):
         """
         Ensure the QApplication is initialized
@@ -644,6 +971,7 @@ class ClarisseEngine(Engine):
         import pyqt_clarisse
         pyqt_clarisse.exec_(qt_app)
 
+    @traced("post_app_init")
     def post_app_init(self):
         """
         Called when all apps have initialized
@@ -652,11 +980,14 @@ class ClarisseEngine(Engine):
 
         # for some readon this engine command get's lost so we add it back
         self.__register_reload_command()
+        self.__register_tracing_commands()
+        self.__register_scene_index_command()
         self.create_shotgun_menu()
 
         # Run a series of app instance commands at startup.
         self._run_app_instance_commands()
 
+    @traced("post_context_change")
     def post_context_change(self, old_context, new_context):
         """
         Runs after a context change. The Clarisse event watching will be
@@ -671,6 +1002,8 @@ class ClarisseEngine(Engine):
         # a context is changed
         self.__register_open_log_folder_command()
         self.__register_reload_command()
+        self.__register_tracing_commands()
+        self.__register_scene_index_command()
 
         if self.get_setting("automatic_context_switch", True):
             # We need to stop watching, and then replace with a new watcher
@@ -696,6 +1029,7 @@ class ClarisseEngine(Engine):
             if old_context != new_context:
                 self.create_shotgun_menu()
 
+    @traced("_run_app_instance_commands")
     def _run_app_instance_commands(self):
         """
         Runs the series of app instance commands listed in the 'run_at_startup' 
@@ -784,6 +1118,7 @@ class ClarisseEngine(Engine):
                             known_commands,
                         )
 
+    @traced("destroy_engine")
     def destroy_engine(self):
         """
         Stops watching scene events and tears down menu.
@@ -794,6 +1129,29 @@ class ClarisseEngine(Engine):
             # stop watching scene events
             self.__watcher.stop_watching()
 
+        # the watchers wrap the same functions, so they are stopped in the
+        # reverse order they were started to restore the original ones
+        self.__validation_cache_watcher.stop_watching()
+        self.__scene_index_watcher.stop_watching()
+        self._scene_index.stop_watching()
+
+    def notify_scene_event(self, event_name):
+        """
+        Runs the callbacks watching the given scene event, ie. after saving
+        the project to a scratch path with the unwatched save_project and
+        pointing it back to its work path.
+
+        :param str event_name: Name of the event, one of SCENE_EVENT_NAMES.
+        """
+        watchers = [self.__scene_index_watcher, self.__validation_cache_watcher]
+        if self.get_setting("automatic_context_switch", True):
+            watchers.append(self.__watcher)
+
+        for watcher in watchers:
+            if event_name in watcher.scene_events:
+                watcher.notify()
+
+    @traced("_init_pyside")
     def _init_pyside(self):
         """
         Handles the pyside init
@@ -868,6 +1226,59 @@ class ClarisseEngine(Engine):
         """
         return None
 
+    @property
+    def scene_index(self):
+        """
+        :class:`SceneFileIndex` of the items referencing files in the scene.
+        """
+        return self._scene_index
+
+    @property
+    def validation_cache(self):
+        """
+        :class:`ValidationCache` of the publish plugins checks on the current
+        session.
+        """
+        return self._validation_cache
+
+    @property
+    def context_cache(self):
+        """
+        :class:`ContextCache` of the contexts resolved for the work areas of
+        the sessions saved and loaded.
+        """
+        return self._context_cache
+
+    @property
+    def published_file_cache(self):
+        """
+        :class:`PublishedFileCache` of the published files found for paths on
+        disk, shared by all the sessions of this user.
+        """
+        if self._published_file_cache is None:
+            tk_clarisse = self.import_module("tk_clarisse")
+            self._published_file_cache = (
+                tk_clarisse.PublishedFileCache.from_cache_folder(
+                    self.cache_location
+                )
+            )
+        return self._published_file_cache
+
+    @property
+    def session_fingerprints(self):
+        """
+        :class:`SessionFingerprints` of the saved and published sessions,
+        shared by all the sessions of this user.
+        """
+        if self._session_fingerprints is None:
+            tk_clarisse = self.import_module("tk_clarisse")
+            self._session_fingerprints = (
+                tk_clarisse.SessionFingerprints.from_cache_folder(
+                    self.cache_location, self.logger
+                )
+            )
+        return self._session_fingerprints
+
     @property
     def has_ui(self):
         """
@@ -894,18 +1305,10 @@ class ClarisseEngine(Engine):
         :param record: Standard python logging record.
         :type record: :class:`~python.logging.LogRecord`
         """
-        # Give a standard format to the message:
-        #     Shotgun <basename>: <message>
-        # where "basename" is the leaf part of the logging record name,
-        # for example "tk-multi-shotgunpanel" or "qt_importer".
         if record.levelno < logging.INFO:
-            formatter = logging.Formatter(
-                "Debug: Shotgun %(basename)s: %(message)s"
-            )
+            msg = DEBUG_LOG_FORMATTER.format(record)
         else:
-            formatter = logging.Formatter("Shotgun %(basename)s: %(message)s")
-
-        msg = formatter.format(record)
+            msg = LOG_FORMATTER.format(record)
 
         # Select Clarisse display function to use according to the logging
         # record level.
@@ -918,8 +1321,38 @@ class ClarisseEngine(Engine):
         else:
             fct = display_debug
 
-        # Display the message in Clarisse script editor in a thread safe manner
-        self.async_execute_in_main_thread(fct, msg)
+        # Queue the message and display all the queued ones in Clarisse
+        # script editor from a single call in the main thread. Appending to a
+        # deque is thread safe and does not need a lock.
+        self.__log_messages.append((fct, msg))
+        if not self.__log_flush_pending:
+            self.__log_flush_pending = True
+            self.async_execute_in_main_thread(self.__flush_log_messages)
+
+    def __flush_log_messages(self):
+        """
+        Displays the queued log messages, showing repeated consecutive
+        messages once along with the number of times they were repeated.
+        """
+        # messages queued from now on need another flush
+        self.__log_flush_pending = False
+
+        t = time.asctime(time.localtime())
+        previous = None
+        repeats = 0
+        while self.__log_messages:
+            message = self.__log_messages.popleft()
+            if message == previous:
+                repeats += 1
+                continue
+
+            if previous:
+                _display_repeated(previous, repeats, t)
+            previous = message
+            repeats = 0
+
+        if previous:
+            _display_repeated(previous, repeats, t)
 
     ###########################################################################
     # scene and project management
@@ -17,22 +17,6 @@ __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 
-def get_contexts(context, result=None):
-    """
-    Returns all the subcontexts of the given context recursively
-    """
-    if result is None:
-        result = []
-
-    result.append(context)
-    subcontext_count = context.get_context_count()
-    for i in range(subcontext_count):
-        subcontext = context.get_context(i)
-        get_contexts(subcontext, result=result)
-
-    return result
-
-
 class BreakdownSceneOperations(Hook):
     """
     Breakdown operations for Clarisse.
@@ -51,76 +35,50 @@ class BreakdownSceneOperations(Hook):
         reference that is returned should be represented by a dictionary with 
         three keys:
 
-        - "attr": The filename attribute of the 'node' that is to be operated
-           on. Most DCCs have a concept of a node, attribute, path or some other
-           way to address a particular object in the scene.
+        - "attr": The full name of the filename attribute of the 'node' that is
+           to be operated on. Most DCCs have a concept of a node, attribute,
+           path or some other way to address a particular object in the scene.
         - "type": The object type that this is. This is later passed to the
            update method so that it knows how to handle the object.
         - "path": Path on disk to the referenced object.
 
+        Frame sequences and udim textures referenced by several attributes are
+        returned once, "node" holds the list of all the attributes pointing
+        to the same files, so each sequence is only matched against the
+        templates once. Attributes are stored by name and only resolved when
+        updated, so no Clarisse object is kept alive by the breakdown UI.
+
         Toolkit will scan the list of items, see if any of the objects matches
         any templates and try to determine if there is a more recent version
         available. Any such versions are then displayed in the UI as out of 
         date.
         """
 
-        # These classes contain a filename property which could contain
-        # publishedFiles and could count as dependencies.
-        #
-        # This link has got a way to get these types dynamically
-        # but it briefly changes the state of the scene so we
-        # choose to hard code the types here instead , which seems
-        # faster and safer.
-        # https://forum.isotropix.com/viewtopic.php?p=14779
+        engine = self.parent.engine
+        tk_clarisse = engine.import_module("tk_clarisse")
 
-        refs = []
+        # kept up to date by the engine, only scanned again after a project
+        # is loaded or the index is refreshed from the menu
+        scene_files = engine.scene_index.files
 
-        types = (
-            "GeometryPolyfile",
-            "GeometryFurFile",
-            "GeometryVolumeFile",
-            "GeometryBundleAlembic",
-            "GeometryBundleUsd",
-            "ProcessAlembicExport",
-            "LightPhysicalSphere",
-            "TextureMapFile",
-            "TextureStreamedMapFile",
-            "TextureOslFile",
+        refs = []
+        for group in tk_clarisse.group_by_sequence(
+            scene_files, lambda scene_file: scene_file.path
+        ):
+            ref_path = group[0].path.replace("/", os.path.sep)
+            refs.append(
+                {
+                    "attr": group[0].key,
+                    "type": "file",
+                    "path": ref_path,
+                    "node": group,
+                }
+            )
+
+        engine.log_debug(
+            "Found %d file references for %d file attributes."
+            % (len(refs), len(scene_files))
         )
-
-        for type_ in types:
-            objects = ix.api.OfObjectVector()
-            ix.application.get_matching_objects(objects, "*", type_)
-            for object in objects:
-                attr = object.get_attribute("filename")
-                if attr:
-                    ref_path = attr.get_string()
-                    ref_path = ref_path.replace("/", os.path.sep)
-                    refs.append(
-                        {
-                            "attr": attr,
-                            "type": "file",
-                            "path": ref_path,
-                            "node": attr,
-                        }
-                    )
-
-        # also do all the contexts
-        context = ix.get_item("project:/")
-        contexts = get_contexts(context)
-        for context in contexts:
-            attr = context.get_attribute("filename")
-            if attr:
-                ref_path = attr.get_string()
-                ref_path = ref_path.replace("/", os.path.sep)
-                refs.append(
-                    {
-                        "attr": attr,
-                        "type": "file",
-                        "path": ref_path,
-                        "node": attr,
-                    }
-                )
         return refs
 
     def update(self, items):
@@ -137,14 +95,29 @@ class BreakdownSceneOperations(Hook):
         """
 
         engine = self.parent.engine
+        tk_clarisse = engine.import_module("tk_clarisse")
 
+        updates = []
         for i in items:
-            attr = i["node"]
+            scene_files = i["node"]
             node_type = i["type"]
             new_path = i["path"]
 
             if node_type == "file":
-                engine.log_debug(
-                    "File %s: Updating to version %s" % (attr, new_path)
-                )
-                attr.set_string(new_path)
+                # all the attributes pointing to the same sequence are updated
+                # together
+                for scene_file in scene_files:
+                    engine.log_debug(
+                        "File %s: Updating to version %s"
+                        % (scene_file.key, new_path)
+                    )
+                    updates.append((scene_file.attr, new_path))
+
+        # checks all the paths exist and applies all the changes at once, so
+        # that each referenced context only gets reloaded once
+        tk_clarisse.update_file_attributes(
+            updates, engine.logger, name="Shotgun Breakdown Update"
+        )
+
+        for attr, new_path in updates:
+            engine.scene_index.update_path(attr, new_path)
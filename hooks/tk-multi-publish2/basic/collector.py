@@ -20,6 +20,12 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# scene outputs collected under the session, attribute name -> (item type,
+# display type, icon)
+SESSION_ITEM_TYPES = {
+    "save_as": ("clarisse.render_output", "Render Output", "publish.png"),
+}
+
 
 class ClarisseSessionCollector(HookBaseClass):
     """
@@ -61,6 +67,19 @@ class ClarisseSessionCollector(HookBaseClass):
                                "to publish plugins via the collected item's "
                                "properties. ",
             },
+            "Collect Scene Items": {
+                "type": "bool",
+                "default": True,
+                "description": "Collect the render outputs of the session as "
+                               "children of the session item.",
+            },
+            "Collect Selected Contexts": {
+                "type": "bool",
+                "default": False,
+                "description": "Collect the contexts selected in Clarisse as "
+                               "children of the session item, to export "
+                               "their geometry.",
+            },
         }
 
         # update the base settings with these settings
@@ -81,6 +100,14 @@ class ClarisseSessionCollector(HookBaseClass):
         # create an item representing the current clarisse session
         item = self.collect_current_clarisse_session(settings, parent_item)
 
+        # and its render outputs
+        if settings.get("Collect Scene Items").value:
+            self.collect_session_items(settings, item)
+
+        # the selected contexts can be exported as geometry caches
+        if settings.get("Collect Selected Contexts").value:
+            self.collect_selected_contexts(settings, item)
+
     def collect_current_clarisse_session(self, settings, parent_item):
         """
         Creates an item that represents the current clarisse session.
@@ -138,3 +165,116 @@ class ClarisseSessionCollector(HookBaseClass):
         self.logger.info("Collected current Clarisse scene")
 
         return session_item
+
+    def collect_session_items(self, settings, session_item):
+        """
+        Creates items for the render outputs found in the session, as
+        children of the session item.
+
+        The outputs come from the engine index of the scene, which is only
+        read if it is up to date: opening the publisher never scans the
+        scene. Nothing is looked up on disk here either, the items only hold
+        the paths, which the publish plugins check when the items are
+        validated. The items are created collapsed so the tree stays short
+        on large scenes.
+
+        The Alembic export processes and the referenced contexts are not
+        collected, as no publish plugin accepts them and the publisher does
+        not show such items: the references are registered as dependencies
+        of the session publish and Alembic caches are exported from the
+        selected contexts instead.
+
+        :param settings: Configured settings for this collector
+        :param session_item: Item of type clarisse.session
+
+        :returns: List of the created items
+        """
+
+        engine = self.parent.engine
+
+        if engine.scene_index.is_dirty:
+            self.logger.info(
+                "The render outputs are collected once the scene has been "
+                "indexed, use Refresh Scene File Index in the Shotgun menu "
+                "and reload the publisher to collect them now."
+            )
+            return []
+
+        items = []
+        for scene_file in engine.scene_index.output_files:
+            item_type = SESSION_ITEM_TYPES.get(scene_file.attr_name)
+            if not item_type or not scene_file.path:
+                continue
+
+            (item_type, type_display, icon_name) = item_type
+            items.append(
+                self._create_session_child_item(
+                    session_item,
+                    item_type,
+                    type_display,
+                    scene_file.item_name,
+                    scene_file.path,
+                    icon_name,
+                )
+            )
+
+        self.logger.info(
+            "Collected %d items from the current Clarisse scene" % len(items)
+        )
+
+        return items
+
+    def _create_session_child_item(
+        self, session_item, item_type, type_display, node_name, path, icon_name
+    ):
+        """
+        Creates a collapsed item for a node of the session.
+        """
+
+        item = session_item.create_item(
+            item_type,
+            type_display,
+            node_name.rsplit("/", 1)[-1]
+        )
+        item.set_icon_from_path(
+            os.path.join(self.disk_location, os.pardir, "icons", icon_name)
+        )
+        item.expanded = False
+
+        item.properties["node_name"] = node_name
+        item.properties["path"] = path
+
+        return item
+
+    def collect_selected_contexts(self, settings, session_item):
+        """
+        Creates an item for each context selected in Clarisse, as children of
+        the session item, to export their geometry.
+
+        :param settings: Configured settings for this collector
+        :param session_item: Item of type clarisse.session
+
+        :returns: List of the created items
+        """
+
+        items = []
+        for i in range(ix.selection.get_count()):
+            selected = ix.selection[i]
+            if not selected.is_context():
+                continue
+
+            items.append(
+                self._create_session_child_item(
+                    session_item,
+                    "clarisse.geometry",
+                    "Clarisse Geometry",
+                    selected.get_full_name(),
+                    "",
+                    "geometry.png",
+                )
+            )
+
+        if items:
+            self.logger.info("Collected %d selected contexts" % len(items))
+
+        return items
@@ -0,0 +1,362 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import re
+import time
+import subprocess
+
+import ix
+import sgtk
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class ClarisseGeometryPublishPlugin(HookBaseClass):
+    """
+    Plugin for exporting Clarisse contexts to Alembic and publishing the
+    caches.
+
+    This hook relies on functionality found in the base file publisher hook in
+    the publish2 app and should inherit from it in the configuration. The hook
+    setting for this plugin should look something like this::
+
+        hook: "{self}/publish_file.py:{engine}/tk-multi-publish2/basic/publish_geometry.py"
+
+    """
+
+    # NOTE: The plugin icon and name are defined by the base file plugin.
+
+    @property
+    def description(self):
+        """
+        Verbose, multi-line description of what the plugin does. This can
+        contain simple html for formatting.
+        """
+
+        return """
+        Exports the selected context to an Alembic cache and publishes it to
+        Shotgun. A <b>Publish</b> entry will be created in Shotgun which will
+        include a reference to the cache's path on disk.
+
+        <h3>Chunked exports</h3>
+        Long frame ranges can be split in chunks exported at the same time by
+        headless Clarisse processes, from the last saved state of the session.
+        The chunks are stitched into a single cache if an Alembic stitcher is
+        configured, otherwise they are published together as a cache set.
+        """
+
+    @property
+    def settings(self):
+        """
+        Dictionary defining the settings that this plugin expects to receive
+        through the settings parameter in the accept, validate, publish and
+        finalize methods.
+
+        A dictionary on the following form::
+
+            {
+                "Settings Name": {
+                    "type": "settings_type",
+                    "default": "default_value",
+                    "description": "One line description of the setting"
+            }
+
+        The type string should be one of the data types that toolkit accepts as
+        part of its environment configuration.
+        """
+
+        # inherit the settings from the base publish plugin
+        base_settings = super(ClarisseGeometryPublishPlugin, self).settings or {}
+
+        # settings specific to this class
+        geometry_publish_settings = {
+            "Publish Template": {
+                "type": "template",
+                "default": None,
+                "description": "Template path for published geometry caches. "
+                "Should correspond to a template defined in templates.yml.",
+            },
+            "Frames Per Chunk": {
+                "type": "int",
+                "default": 0,
+                "description": "Split the frame range in chunks of this many "
+                "frames, exported by headless Clarisse processes. If 0, the "
+                "cache is exported in the current session.",
+            },
+            "Max Child Processes": {
+                "type": "int",
+                "default": 4,
+                "description": "Maximum number of chunks exported at the same "
+                "time.",
+            },
+            "Alembic Stitcher": {
+                "type": "str",
+                "default": "",
+                "description": "Path to a tool to stitch the chunks into a "
+                "single cache, called as: stitcher output.abc chunk1.abc "
+                "chunk2.abc ... If empty, the chunks are published as a cache "
+                "set.",
+            },
+        }
+
+        # update the base settings
+        base_settings.update(geometry_publish_settings)
+
+        return base_settings
+
+    @property
+    def item_filters(self):
+        """
+        List of item types that this plugin is interested in.
+
+        Only items matching entries in this list will be presented to the
+        accept() method. Strings can contain glob patters such as *, for
+        example ["clarisse.*", "file.clarisse"]
+        """
+        return ["clarisse.geometry"]
+
+    def accept(self, settings, item):
+        """
+        Method called by the publisher to determine if an item is of any
+        interest to this plugin. Only items matching the filters defined via
+        the item_filters property will be presented to this method.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property. The values
+                         are `Setting` instances.
+        :param item: Item to process
+
+        :returns: dictionary with boolean keys accepted, required and enabled
+        """
+
+        if not hasattr(ix.api, "AbcExportOptions"):
+            self.logger.debug(
+                "Alembic export is not available in this Clarisse version."
+            )
+            return {"accepted": False}
+
+        # if a publish template is configured, disable context change. This
+        # is a temporary measure until the publisher handles context switching
+        # natively.
+        if settings.get("Publish Template").value:
+            item.context_change_allowed = False
+
+        # exports are only published when the artist asks for them
+        return {"accepted": True, "checked": False}
+
+    def validate(self, settings, item):
+        """
+        Validates the given item to check that it is ok to publish. Returns a
+        boolean to indicate validity.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property. The values
+                         are `Setting` instances.
+        :param item: Item to process
+        :returns: True if item is valid, False otherwise.
+        """
+
+        publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
+
+        session_path = _session_path()
+        if not session_path:
+            error_msg = "The Clarisse session has not been saved."
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        if settings.get("Frames Per Chunk").value > 0:
+            if not tk_clarisse.get_cnode_path():
+                error_msg = (
+                    "Could not find cnode to export the chunks, set "
+                    "CLARISSE_BIN_DIR to the Clarisse installation folder."
+                )
+                self.logger.error(error_msg)
+                raise Exception(error_msg)
+
+            if tk_clarisse.is_session_modified():
+                self.logger.warning(
+                    "The chunks are exported from the last saved state of "
+                    "the session, save it or publish it first to include the "
+                    "latest changes."
+                )
+
+        publish_path = self._get_cache_path(settings, item, session_path)
+        item.properties["path"] = publish_path
+        item.properties["cache_path"] = publish_path
+
+        return super(ClarisseGeometryPublishPlugin, self).validate(
+            settings, item
+        )
+
+    def publish(self, settings, item):
+        """
+        Executes the publish logic for the given item and settings.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+        """
+
+        publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
+
+        node_name = item.properties["node_name"]
+        cache_path = item.properties["cache_path"]
+        frame_range = ix.application.get_current_frame_range()
+        chunks = tk_clarisse.split_frame_range(
+            frame_range[0],
+            frame_range[1],
+            settings.get("Frames Per Chunk").value,
+        )
+
+        start = time.time()
+        if len(chunks) == 1:
+            tk_clarisse.export_alembic(
+                [node_name], cache_path, chunks[0][0], chunks[0][1]
+            )
+            item.properties["path"] = cache_path
+        else:
+            chunk_paths = self._export_chunks(
+                settings, node_name, cache_path, chunks
+            )
+
+            stitcher = settings.get("Alembic Stitcher").value
+            if stitcher:
+                subprocess.check_call([stitcher, cache_path] + chunk_paths)
+                for chunk_path in chunk_paths:
+                    os.remove(chunk_path)
+                item.properties["path"] = cache_path
+            else:
+                # published as a single cache set
+                item.properties["path"] = tk_clarisse.get_chunks_path(
+                    cache_path
+                )
+                item.properties["is_sequence"] = True
+                item.properties["sequence_paths"] = chunk_paths
+
+        self.logger.info(
+            "Exported %s frames %d-%d in %d chunks in %.2fs."
+            % (
+                node_name,
+                chunks[0][0],
+                chunks[-1][1],
+                len(chunks),
+                time.time() - start,
+            )
+        )
+
+        item.properties["publish_type"] = "Alembic Cache"
+
+        # let the base class register the publish
+        super(ClarisseGeometryPublishPlugin, self).publish(settings, item)
+
+    def _export_chunks(self, settings, node_name, cache_path, chunks):
+        """
+        Exports the given chunks of frames at the same time in headless
+        Clarisse processes, keeping the session responsive meanwhile.
+
+        :returns: List of the paths to the chunks.
+        """
+
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+        cnode_path = tk_clarisse.get_cnode_path()
+        session_path = _session_path()
+
+        chunk_paths = []
+        commands = []
+        for (first_frame, last_frame) in chunks:
+            chunk_path = tk_clarisse.get_chunk_path(cache_path, first_frame)
+            chunk_paths.append(chunk_path)
+            commands.append(
+                tk_clarisse.get_export_command(
+                    cnode_path,
+                    session_path,
+                    [node_name],
+                    chunk_path,
+                    first_frame,
+                    last_frame,
+                )
+            )
+
+        tk_clarisse.run_child_processes(
+            commands,
+            settings.get("Max Child Processes").value,
+            self.logger,
+            wait_fn=ix.application.check_for_events,
+        )
+
+        return chunk_paths
+
+    def _get_cache_path(self, settings, item, session_path):
+        """
+        Returns the path to export the cache of the given item to, from the
+        publish template if configured, otherwise next to the session.
+        """
+
+        publisher = self.parent
+        node_name = item.properties["node_name"]
+        cache_name = re.sub(r"[^0-9a-zA-Z_]", "_", node_name.rsplit("/", 1)[-1])
+
+        publish_template = publisher.engine.get_template_by_name(
+            settings.get("Publish Template").value
+        )
+        work_template = item.parent.properties.get("work_template")
+        if not publish_template or not work_template:
+            (root, _) = os.path.splitext(session_path)
+            return os.path.join(
+                os.path.dirname(session_path),
+                "alembic",
+                "%s_%s.abc" % (os.path.basename(root), cache_name),
+            )
+
+        if not work_template.validate(session_path):
+            error_msg = (
+                "The current session does not match the configured work "
+                "file template."
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        fields = work_template.get_fields(session_path)
+        fields.update(item.context.as_template_fields(publish_template))
+        if "name" in publish_template.keys:
+            fields["name"] = cache_name
+
+        missing_keys = publish_template.missing_keys(fields)
+        if missing_keys:
+            error_msg = (
+                "Work file '%s' missing keys required for the publish "
+                "template: %s" % (session_path, missing_keys)
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        return publish_template.apply_fields(fields)
+
+
+def _session_path():
+    """
+    Return the path to the current session
+    :return:
+    """
+    path = ix.application.get_current_project_filename()
+
+    if isinstance(path, unicode):
+        path = path.encode("utf-8")
+
+    return path
@@ -0,0 +1,219 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+import ix
+import sgtk
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+
+class ClarisseRenderOutputPublishPlugin(HookBaseClass):
+    """
+    Plugin for publishing the frames rendered for a Clarisse image.
+
+    This hook relies on functionality found in the base file publisher hook in
+    the publish2 app and should inherit from it in the configuration. The hook
+    setting for this plugin should look something like this::
+
+        hook: "{self}/publish_file.py:{engine}/tk-multi-publish2/basic/publish_render_output.py"
+
+    """
+
+    # NOTE: The plugin icon and name are defined by the base file plugin.
+
+    @property
+    def description(self):
+        """
+        Verbose, multi-line description of what the plugin does. This can
+        contain simple html for formatting.
+        """
+
+        return """
+        Publishes the frames rendered to disk for a Clarisse image. A single
+        <b>Publish</b> entry will be created in Shotgun for the whole image
+        sequence.
+
+        The frames are found when the item is validated. Missing frames
+        between the first and last frames found are reported.
+        """
+
+    @property
+    def settings(self):
+        """
+        Dictionary defining the settings that this plugin expects to receive
+        through the settings parameter in the accept, validate, publish and
+        finalize methods.
+
+        A dictionary on the following form::
+
+            {
+                "Settings Name": {
+                    "type": "settings_type",
+                    "default": "default_value",
+                    "description": "One line description of the setting"
+            }
+
+        The type string should be one of the data types that toolkit accepts as
+        part of its environment configuration.
+        """
+
+        # inherit the settings from the base publish plugin
+        base_settings = (
+            super(ClarisseRenderOutputPublishPlugin, self).settings or {}
+        )
+
+        # settings specific to this class
+        render_output_settings = {
+            "Allow Missing Frames": {
+                "type": "bool",
+                "default": True,
+                "description": "If False, validation fails when there are "
+                "frames missing in the rendered sequence.",
+            },
+        }
+
+        # update the base settings
+        base_settings.update(render_output_settings)
+
+        return base_settings
+
+    @property
+    def item_filters(self):
+        """
+        List of item types that this plugin is interested in.
+
+        Only items matching entries in this list will be presented to the
+        accept() method. Strings can contain glob patters such as *, for
+        example ["clarisse.*", "file.clarisse"]
+        """
+        return ["clarisse.render_output"]
+
+    def accept(self, settings, item):
+        """
+        Method called by the publisher to determine if an item is of any
+        interest to this plugin. Only items matching the filters defined via
+        the item_filters property will be presented to this method.
+
+        Nothing is looked up on disk here, render outputs are left unchecked
+        so their frames are only searched for when the artist picks them.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property. The values
+                         are `Setting` instances.
+        :param item: Item to process
+
+        :returns: dictionary with boolean keys accepted, required and enabled
+        """
+        return {"accepted": True, "checked": False}
+
+    def validate(self, settings, item):
+        """
+        Validates the given item to check that it is ok to publish. Returns a
+        boolean to indicate validity.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property. The values
+                         are `Setting` instances.
+        :param item: Item to process
+        :returns: True if item is valid, False otherwise.
+        """
+
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+        sequence = self._find_image_sequence(item)
+
+        if not sequence.frames:
+            error_msg = "No frames rendered for %s" % (sequence.path,)
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        missing_frames = sequence.missing_frames
+        if missing_frames:
+            message = "Missing frames in %s: %s" % (
+                sequence.path,
+                tk_clarisse.format_frame_ranges(missing_frames),
+            )
+            if not settings.get("Allow Missing Frames").value:
+                self.logger.error(message)
+                raise Exception(message)
+            self.logger.warning(message)
+
+        if sequence.is_sequence:
+            self.logger.info(
+                "Found frames %s for %s"
+                % (tk_clarisse.format_frame_ranges(sequence.frames), sequence.path)
+            )
+
+        # set the sequence on the item for use by the base plugin
+        item.properties["path"] = sequence.path
+        item.properties["is_sequence"] = sequence.is_sequence
+        item.properties["sequence_paths"] = sequence.frame_paths
+
+        return super(ClarisseRenderOutputPublishPlugin, self).validate(
+            settings, item
+        )
+
+    def _find_image_sequence(self, item):
+        """
+        Returns the :class:`ImageSequence` rendered for the given item.
+
+        The frames of all the render outputs of the session are searched for
+        at once, so each output folder is only listed once per validation.
+        """
+
+        # found for this item along with another render output
+        sequence = item.properties.pop("image_sequence", None)
+        if sequence is not None:
+            return sequence
+
+        items = [
+            sibling
+            for sibling in item.parent.children
+            if sibling is item
+            or _get_item_type(sibling) == _get_item_type(item)
+        ]
+        paths = dict(
+            (sibling, _expand_path(sibling.properties["path"]))
+            for sibling in items
+        )
+
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+        sequences = tk_clarisse.find_image_sequences(set(paths.values()))
+
+        for sibling in items:
+            if sibling is not item:
+                sibling.properties["image_sequence"] = sequences[paths[sibling]]
+
+        return sequences[paths[item]]
+
+
+def _get_item_type(item):
+    """
+    Returns the type of the given item, across publish2 versions.
+    """
+    return getattr(item, "type_spec", None) or item.type
+
+
+def _expand_path(path):
+    """
+    Returns the given output path with the project folder and the
+    environment variables expanded.
+    """
+    project_path = ix.application.get_current_project_filename()
+    if project_path:
+        path = path.replace("$PDIR", os.path.dirname(project_path))
+
+    return os.path.normpath(os.path.expandvars(path))
@@ -9,6 +9,7 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import traceback
 from contextlib import contextmanager
 
 import ix
@@ -40,22 +41,6 @@ def disabled_updates():
         clarisse_win.set_mouse_cursor(ix.api.Gui.MOUSE_CURSOR_DEFAULT)
 
 
-def get_contexts(context, result=None):
-    """
-    Returns all the subcontexts of the given context recursively
-    """
-    if result is None:
-        result = []
-
-    result.append(context)
-    subcontext_count = context.get_context_count()
-    for i in range(subcontext_count):
-        subcontext = context.get_context(i)
-        get_contexts(subcontext, result=result)
-
-    return result
-
-
 class ClarisseSessionPublishPlugin(HookBaseClass):
     """
     Plugin for publishing an open clarisse session.
@@ -160,7 +145,36 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
                 "description": "Template path for published work files. Should"
                 "correspond to a template defined in "
                 "templates.yml.",
-            }
+            },
+            "Template Dependencies Only": {
+                "type": "bool",
+                "default": True,
+                "description": "Only register as dependencies the files "
+                "referenced by the session that match a template defined in "
+                "templates.yml.",
+            },
+            "Save Locally First": {
+                "type": "bool",
+                "default": False,
+                "description": "Save the session to a local scratch folder "
+                "and copy it to its destination in the background, so that "
+                "Clarisse does not freeze while writing to the network.",
+            },
+            "Skip Unchanged Sessions": {
+                "type": "bool",
+                "default": False,
+                "description": "Do not save nor publish again a session that "
+                "has not changed since it was last published, link the item to "
+                "the existing publish instead. Each published session is read "
+                "back to checksum it, unless Save Locally First is enabled.",
+            },
+            "Hardlink Publishes": {
+                "type": "bool",
+                "default": False,
+                "description": "Allow hardlinking the work file to the publish "
+                "path when they can not be cloned. Only enable it if published "
+                "files are read-only and work files are never saved over.",
+            },
         }
 
         # update the base settings
@@ -241,6 +255,7 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         """
 
         publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
         path = _session_path()
 
         # ---- ensure the session has been saved
@@ -259,10 +274,33 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         # etc.
         path = sgtk.util.ShotgunPath.normalize(path)
 
+        work_template = item.properties.get("work_template")
+        publish_template = publisher.engine.get_template_by_name(
+            settings.get("Publish Template").value
+        )
+
+        # ---- skip the checks if nothing they depend on has changed
+
+        validation_cache = publisher.engine.validation_cache
+        cache_key = validation_cache.key(
+            self.name,
+            "validate",
+            path,
+            str(item.context),
+            settings,
+            work_template,
+            publish_template,
+        )
+        if validation_cache.get(cache_key):
+            if publish_template:
+                item.properties["publish_template"] = publish_template
+            item.properties["path"] = path
+            self.logger.debug("The session has already been validated.")
+            return True
+
         # if the session item has a known work template, see if the path
         # matches. if not, warn the user and provide a way to save the file to
         # a different path
-        work_template = item.properties.get("work_template")
         if work_template:
             if not work_template.validate(path):
                 self.logger.warning(
@@ -289,13 +327,18 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
 
         # check to see if the next version of the work file already exists on
         # disk. if so, warn the user and provide the ability to jump to save
-        # to that version now
+        # to that version now. The work folder is only listed if it does.
+        versions = tk_clarisse.WorkFileVersions(path, work_template)
         (next_version_path, version) = self._get_next_version_info(path, item)
-        if next_version_path and os.path.exists(next_version_path):
-
-            # determine the next available version_number. just keep asking for
-            # the next one until we get one that doesn't exist.
-            while os.path.exists(next_version_path):
+        if next_version_path and versions.exists(next_version_path):
+
+            # determine the next available version_number, straight from the
+            # listing if the work template matches, otherwise just keep
+            # asking for the next one until we get one that doesn't exist.
+            (free_path, free_version) = versions.get_next_free_version(path)
+            if free_path:
+                (next_version_path, version) = (free_path, free_version)
+            while versions.exists(next_version_path):
                 (next_version_path, version) = self._get_next_version_info(
                     next_version_path, item
                 )
@@ -317,10 +360,6 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         # ---- populate the necessary properties and call base class validation
 
         # populate the publish template on the item if found
-        publish_template_setting = settings.get("Publish Template")
-        publish_template = publisher.engine.get_template_by_name(
-            publish_template_setting.value
-        )
         if publish_template:
             item.properties["publish_template"] = publish_template
 
@@ -330,9 +369,12 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         item.properties["path"] = path
 
         # run the base class validation
-        return super(ClarisseSessionPublishPlugin, self).validate(
+        is_valid = super(ClarisseSessionPublishPlugin, self).validate(
             settings, item
         )
+        if is_valid:
+            validation_cache.set(cache_key, True)
+        return is_valid
 
     def publish(self, settings, item):
         """
@@ -348,19 +390,104 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         # are appropriate for current os, no double separators, etc.
         path = sgtk.util.ShotgunPath.normalize(_session_path())
 
-        # ensure the session is saved
-        _save_session(path)
+        publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
+        skip_unchanged = settings.get("Skip Unchanged Sessions").value
+        unchanged = (
+            skip_unchanged
+            and os.path.exists(path)
+            and not tk_clarisse.is_session_modified()
+        )
+
+        # a session that has not changed since it was published is not
+        # published again, the item is linked to the existing publish
+        if unchanged:
+            previous_publish = self._find_previous_publish(path, item)
+            if previous_publish:
+                item.properties["path"] = path
+                item.properties["sg_publish_data"] = previous_publish
+                item.properties["unchanged_session"] = True
+                self.logger.info(
+                    "The session has not changed since it was published as "
+                    "version %s, linking to that publish."
+                    % (previous_publish.get("version_number"),)
+                )
+                return
+
+        # ensure the session is saved. When saving locally first, the copy to
+        # the destination runs while the dependencies are resolved.
+        session_copy = None
+        if unchanged:
+            self.logger.debug("The session has no unsaved changes.")
+        else:
+            session_copy = _save_session(
+                path,
+                local_scratch=settings.get("Save Locally First").value,
+                checksum=skip_unchanged,
+            )
 
         # update the item with the saved session path
         item.properties["path"] = path
 
-        # add dependencies for the base class to register when publishing
-        item.properties[
-            "publish_dependencies"
-        ] = _clarisse_find_additional_session_dependencies()
+        # resolve the dependencies to published files in a few batched
+        # queries, instead of letting the base class look them up one by one
+        dependency_paths = _clarisse_find_additional_session_dependencies(
+            publisher.sgtk, settings.get("Template Dependencies Only").value
+        )
+        published_files = tk_clarisse.resolve_published_files(
+            publisher.sgtk,
+            dependency_paths,
+            self.logger,
+            cache=publisher.engine.published_file_cache,
+        )
+        dependency_ids = sorted(
+            set(sg_data["id"] for sg_data in published_files.values())
+        )
+        item.properties["publish_dependency_ids"] = dependency_ids
+        item.properties["publish_dependencies"] = []
+
+        # the ids are registered along with the publish, in the same call,
+        # so a publish is never left without its dependencies
+        publish_kwargs = dict(item.properties.get("publish_kwargs") or {})
+        publish_kwargs["dependency_ids"] = list(dependency_ids)
+        if "sg_publish_data" in item.parent.properties:
+            publish_kwargs["dependency_ids"].append(
+                item.parent.properties["sg_publish_data"]["id"]
+            )
+        item.properties["publish_kwargs"] = publish_kwargs
+
+        # only register the publish once the session is safely on disk
+        if session_copy:
+            _wait_for_session_copy(session_copy)
 
         # let the base class register the publish
-        super(ClarisseSessionPublishPlugin, self).publish(settings, item)
+        try:
+            super(ClarisseSessionPublishPlugin, self).publish(settings, item)
+        except Exception:
+            # resolve them again next time, in case any of the published
+            # files was rejected
+            publisher.engine.published_file_cache.invalidate(
+                list(published_files)
+            )
+            raise
+
+        self.logger.info(
+            "Registered %d published files as dependencies."
+            % len(dependency_ids)
+        )
+
+        # remember the contents published, to spot unchanged sessions later
+        if skip_unchanged:
+            fingerprints = publisher.engine.session_fingerprints
+            if session_copy:
+                # computed from the local scratch file while it was copied
+                checksum = session_copy.checksum
+                fingerprints.set_checksum(path, checksum)
+            else:
+                checksum = fingerprints.get_checksum(path)
+            fingerprints.set_publish(
+                path, checksum, item.properties["sg_publish_data"]
+            )
 
     def finalize(self, settings, item):
         """
@@ -373,66 +500,215 @@ class ClarisseSessionPublishPlugin(HookBaseClass):
         :param item: Item to process
         """
 
+        # nothing was published, so there is nothing to version up either
+        if item.properties.get("unchanged_session"):
+            self.logger.info(
+                "Session unchanged, linked to the existing publish: %s"
+                % (item.properties["path"],)
+            )
+            return
+
         # do the base class finalization
         super(ClarisseSessionPublishPlugin, self).finalize(settings, item)
 
         # bump the session file to the next version
-        self._save_to_next_version(item.properties["path"], item, _save_session)
+        self._save_to_next_free_version(
+            item.properties["path"],
+            item,
+            local_scratch=settings.get("Save Locally First").value,
+        )
+
+    def _find_previous_publish(self, path, item):
+        """
+        Returns the publish registered for the given session file with the
+        same contents, if it still exists and was published for the entity
+        and task of the item.
+
+        :param path: Path to the saved session.
+        :param item: Item to process
+        :returns: Entity dictionary of the publish, or None.
+        """
+        fingerprints = self.parent.engine.session_fingerprints
+        previous_publish = fingerprints.get_publish(
+            path, fingerprints.get_checksum(path)
+        )
+        if not previous_publish:
+            return None
+
+        sg_publish_data = self.parent.shotgun.find_one(
+            previous_publish["type"],
+            [["id", "is", previous_publish["id"]]],
+            ["id", "type", "code", "path", "version_number", "entity", "task"],
+        )
+        if not sg_publish_data:
+            return None
+
+        # the item could be in another context than the one the file was
+        # published for, ie. after switching tasks
+        context = item.context
+        for (field, entity) in (
+            ("entity", context.entity),
+            ("task", context.task),
+        ):
+            published_entity = sg_publish_data.get(field)
+            if _entity_id(published_entity) != _entity_id(entity):
+                self.logger.debug(
+                    "The previous publish of the session is for another %s: "
+                    "%s" % (field, published_entity)
+                )
+                return None
+
+        return sg_publish_data
+
+    def _copy_work_to_publish(self, settings, item):
+        """
+        Copies the session from the work path to the publish path, cloning or
+        linking it where the file system allows it instead of copying all the
+        data.
 
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+        """
+        work_template = item.properties.get("work_template")
+        if not work_template:
+            self.logger.debug(
+                "No work template set on the item. "
+                "Skipping copy file to publish location."
+            )
+            return
+
+        publish_template = self.get_publish_template(settings, item)
+        if not publish_template:
+            self.logger.debug(
+                "No publish template set on the item. "
+                "Skipping copying file to publish location."
+            )
+            return
+
+        work_file = item.properties["path"]
+        if not work_template.validate(work_file):
+            self.logger.warning(
+                "Work file '%s' did not match work template '%s'. "
+                "Publishing in place." % (work_file, work_template)
+            )
+            return
+
+        work_fields = work_template.get_fields(work_file)
+        missing_keys = publish_template.missing_keys(work_fields)
+        if missing_keys:
+            self.logger.warning(
+                "Work file '%s' missing keys required for the publish "
+                "template: %s" % (work_file, missing_keys)
+            )
+            return
+
+        publish_file = publish_template.apply_fields(work_fields)
+
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+        try:
+            (strategy, size, seconds) = tk_clarisse.copy_file(
+                work_file,
+                publish_file,
+                allow_hardlink=settings.get("Hardlink Publishes").value,
+            )
+        except Exception:
+            raise Exception(
+                "Failed to copy work file from '%s' to '%s'.\n%s"
+                % (work_file, publish_file, traceback.format_exc())
+            )
+
+        megabytes = size / (1024.0 * 1024.0)
+        self.logger.info(
+            "Copied work file to publish file using %s: %.1f MB in %.2fs "
+            "(%.1f MB/s)."
+            % (strategy, megabytes, seconds, megabytes / max(seconds, 0.001))
+        )
+        self.logger.debug(
+            "Copied work file '%s' to publish file '%s'."
+            % (work_file, publish_file)
+        )
+
+    def _save_to_next_free_version(self, path, item, local_scratch=False):
+        """
+        Save the session to the next version of the given path, unless that
+        version already exists on disk.
+
+        :param path: The path of the published session.
+        :param item: Item to process
+        :param local_scratch: If True, save to a local scratch folder first.
+        :returns: The path the session was saved to, or None.
+        """
+        (next_version_path, version) = self._get_next_version_info(path, item)
+        if not next_version_path:
+            self.logger.warning("No next version available for: %s" % (path,))
+            return None
+
+        if os.path.exists(next_version_path):
+            self.logger.warning(
+                "The next version of the path already exists: %s"
+                % (next_version_path,)
+            )
+            return None
 
-def _clarisse_find_additional_session_dependencies():
+        session_copy = _save_session(
+            next_version_path, local_scratch=local_scratch
+        )
+        if session_copy:
+            _wait_for_session_copy(session_copy)
+        self.logger.info("Session saved as: %s" % (next_version_path,))
+
+        return next_version_path
+
+
+def _clarisse_find_additional_session_dependencies(tk, template_paths_only):
     """
     Find additional dependencies from the session
+
+    :param tk: Toolkit instance whose templates the paths are matched against.
+    :param template_paths_only: If True, only the paths that match a template
+        defined in the configuration are returned.
     """
-    # These classes contain a filename propertym which could contain
-    # publishedFiles and could count as dependencies.
-    #
-    # This link has got a way to get these types dynamically
-    # but it briefly changes the state of the scene.
-    # https://forum.isotropix.com/viewtopic.php?p=14779
-
-    types = (
-        "GeometryPolyfile",
-        "GeometryFurFile",
-        "GeometryVolumeFile",
-        "GeometryBundleAlembic",
-        "GeometryBundleUsd",
-        "ProcessAlembicExport",
-        "LightPhysicalSphere",
-        "TextureMapFile",
-        "TextureStreamedMapFile",
-        "TextureOslFile",
-    )
+    engine = sgtk.platform.current_engine()
+    tk_clarisse = engine.import_module("tk_clarisse")
 
     # default implementation looks for references and
     # textures (file nodes) and returns any paths that
     # match a template defined in the configuration
     ref_paths = set()
-    for type_ in types:
-        objects = ix.api.OfObjectVector()
-        ix.application.get_matching_objects(objects, "*", type_)
-        for object in objects:
-            attr = object.get_attribute("filename")
-            if attr:
-                path = attr.get_string()
-                if isinstance(path, unicode):
-                    path = path.encode("utf-8")
-                ref_paths.add(path)
-
-    # also do the contexts
-    context = ix.get_item('project:/')
-    contexts = get_contexts(context)
-    for context in contexts:
-        attr = context.get_attribute("filename")
-        if attr:
-            path = attr.get_string()
-            if isinstance(path, unicode):
-                path = path.encode("utf-8")
-            ref_paths.add(path)
+    for path in engine.scene_index.paths:
+        if isinstance(path, unicode):
+            path = path.encode("utf-8")
+        ref_paths.add(path)
+
+    if template_paths_only:
+        # all the templates are compiled into a single matcher so that
+        # library files, HDRIs and such are discarded in a single pass
+        template_filter = tk_clarisse.TemplatePathFilter.from_sgtk(tk)
+        matching_paths = template_filter.filter(ref_paths)
+        engine.logger.debug(
+            "%d of %d scene paths match any of the %d path templates."
+            % (
+                len(matching_paths),
+                len(ref_paths),
+                template_filter.template_count,
+            )
+        )
+        return matching_paths
 
     return list(ref_paths)
 
 
+def _entity_id(entity):
+    """
+    Returns the type and id of the given entity dictionary, or None.
+    """
+    if not entity:
+        return None
+    return (entity.get("type"), entity.get("id"))
+
+
 def _session_path():
     """
     Return the path to the current session
@@ -446,17 +722,74 @@ def _session_path():
     return path
 
 
-def _save_session(path):
+def _save_session(path, local_scratch=False, checksum=False):
     """
     Save the current session to the supplied path.
+
+    :param path: Path to save the session to.
+    :param local_scratch: If True, the session is saved to a local scratch
+        folder and copied to the path in a background thread.
+    :param checksum: If True and the session is saved to the scratch folder,
+        its checksum is computed in the background thread too.
+    :returns: The :class:`BackgroundCopy` copying the session to the path, to
+        wait on, or None if the session was saved straight to the path.
     """
 
     # Ensure that the folder is created when saving
     folder = os.path.dirname(path)
     ensure_folder_exists(folder)
 
+    # the current project needs to point at the final path after saving to
+    # the scratch folder, which not every Clarisse version allows
+    if not local_scratch or not hasattr(
+        ix.application, "set_current_project_filename"
+    ):
+        with disabled_updates():
+            ix.application.save_project(path)
+        return None
+
+    engine = sgtk.platform.current_engine()
+    tk_clarisse = engine.import_module("tk_clarisse")
+
+    # the engine watchers would otherwise react to the project being saved
+    # to the scratch path, ie. switching to the context of that path, so the
+    # unwatched function is used and they are notified once the project
+    # points back to its path
+    save_project = ix.application.save_project
+    while hasattr(save_project, "_original"):
+        save_project = save_project._original
+
+    scratch_path = tk_clarisse.get_scratch_path(path)
     with disabled_updates():
-        ix.application.save_project(path)
+        save_project(scratch_path)
+        ix.application.set_current_project_filename(path)
+    engine.notify_scene_event("save_project")
+
+    return tk_clarisse.BackgroundCopy(
+        scratch_path, path, engine.logger, checksum=checksum
+    ).start()
+
+
+def _wait_for_session_copy(session_copy):
+    """
+    Waits for a session saved to the scratch folder to be copied to its path.
+
+    If the copy fails, the project is pointed back at the scratch file, the
+    only up to date copy of the session, so Clarisse does not take the old
+    file at the path as the saved session.
+
+    :param session_copy: :class:`BackgroundCopy` returned by _save_session.
+    :raises: TankError if the session could not be copied.
+    """
+    try:
+        session_copy.wait()
+    except sgtk.TankError as e:
+        ix.application.set_current_project_filename(session_copy.source)
+        raise sgtk.TankError(
+            "%s\nThe session is saved at %s instead, save it to %s again "
+            "before publishing."
+            % (e, session_copy.source, session_copy.destination)
+        )
 
 
 # TODO: method duplicated in all the clarisse hooks
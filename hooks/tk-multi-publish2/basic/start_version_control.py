@@ -9,6 +9,7 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import time
 from contextlib import contextmanager
 
 import ix
@@ -117,7 +118,15 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
         The type string should be one of the data types that toolkit accepts as
         part of its environment configuration.
         """
-        return {}
+        return {
+            "Keep Unversioned Copy": {
+                "type": "bool",
+                "default": True,
+                "description": "Also update the file without a version "
+                "number with the contents of the first version. The file is "
+                "cloned or copied in the background instead of saved again.",
+            },
+        }
 
     def accept(self, settings, item):
         """
@@ -145,8 +154,22 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
         :returns: dictionary with boolean keys accepted, required and enabled
         """
 
+        publisher = self.parent
         path = _session_path()
 
+        # the result does not change until the session is saved or loaded
+        validation_cache = publisher.engine.validation_cache
+        cache_key = validation_cache.key(
+            self.name,
+            "accept",
+            path,
+            str(item.context),
+            settings,
+            item.properties.get("work_template"),
+        )
+        if path and cache_key in validation_cache:
+            return validation_cache.get(cache_key)
+
         if path:
             version_number = self._get_version_number(path, item)
             if version_number is not None:
@@ -158,6 +181,7 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
                     "  There is already a version number in the file..."
                 )
                 self.logger.info("  Clarisse file path: %s" % (path,))
+                validation_cache.set(cache_key, {"accepted": False})
                 return {"accepted": False}
         else:
             # the session has not been saved before (no path determined).
@@ -175,6 +199,8 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
 
         # accept the plugin, but don't force the user to add a version number
         # (leave it unchecked)
+        if path:
+            validation_cache.set(cache_key, {"accepted": True, "checked": False})
         return {"accepted": True, "checked": False}
 
     def validate(self, settings, item):
@@ -207,6 +233,14 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
         # field defined within it. Simply use the path info hook to inject a
         # version number into the current file path
 
+        validation_cache = publisher.engine.validation_cache
+        cache_key = validation_cache.key(
+            self.name, "validate", path, str(item.context), settings
+        )
+        if validation_cache.get(cache_key):
+            self.logger.debug("The session has already been validated.")
+            return True
+
         # get the path to a versioned copy of the file.
         version_path = publisher.util.get_version_path(path, "v001")
         if os.path.exists(version_path):
@@ -217,6 +251,7 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
             self.logger.error(error_msg, extra=_get_save_as_action())
             raise Exception(error_msg)
 
+        validation_cache.set(cache_key, True)
         return True
 
     def publish(self, settings, item):
@@ -235,18 +270,29 @@ class ClarisseStartVersionControlPlugin(HookBaseClass):
         # are appropriate for current os, no double separators, etc.
         path = sgtk.util.ShotgunPath.normalize(_session_path())
 
-        # ensure the session is saved in its current state
-        _save_session(path)
-
         # get the path to a versioned copy of the file.
         version_path = publisher.util.get_version_path(path, "v001")
 
-        # save to the new version path
+        # save the session once, to the new version path
+        start = time.time()
         _save_session(version_path)
         self.logger.info(
             "A version number has been added to the Clarisse file..."
         )
         self.logger.info("  Clarisse file path: %s" % (version_path,))
+        self.logger.debug(
+            "Saved the session in %.2fs." % (time.time() - start,)
+        )
+
+        # and bring the file without a version up to date from the new one,
+        # without serializing the project again. The copy is waited on here,
+        # as the session publish that runs next can save over the new version
+        # while it is being read.
+        if settings.get("Keep Unversioned Copy").value:
+            tk_clarisse = publisher.engine.import_module("tk_clarisse")
+            tk_clarisse.BackgroundCopy(
+                version_path, path, self.logger, remove_source=False
+            ).start().wait()
 
     def finalize(self, settings, item):
         """
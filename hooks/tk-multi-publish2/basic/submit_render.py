@@ -0,0 +1,381 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import re
+import time
+import tempfile
+from contextlib import contextmanager
+
+import ix
+import sgtk
+from sgtk.util.filesystem import ensure_folder_exists
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+HookBaseClass = sgtk.get_hook_baseclass()
+
+# snapshots and logs older than this are removed when submitting new renders
+SNAPSHOT_MAX_AGE = 7 * 24 * 60 * 60
+
+
+@contextmanager
+def disabled_updates():
+    """
+    Convenient context that allows to execute a command disabling the
+    upating mechanism in Clarisse, which makes things faster.
+    """
+    clarisse_win = ix.application.get_event_window()
+    clarisse_win.set_mouse_cursor(ix.api.Gui.MOUSE_CURSOR_WAIT)
+    ix.application.disable()
+
+    try:
+        yield
+    finally:
+        ix.application.enable()
+        clarisse_win.set_mouse_cursor(ix.api.Gui.MOUSE_CURSOR_DEFAULT)
+
+
+class ClarisseSubmitRenderPlugin(HookBaseClass):
+    """
+    Plugin to render the frame range of a Clarisse image in chunks, submitting
+    one job per chunk to a scheduler.
+    """
+
+    @property
+    def icon(self):
+        """
+        Path to an png icon on disk
+        """
+
+        # look for icon one level up from this hook's folder in "icons" folder
+        return os.path.join(
+            self.disk_location, os.pardir, "icons", "publish.png"
+        )
+
+    @property
+    def name(self):
+        """
+        One line display name describing the plugin
+        """
+        return "Submit render"
+
+    @property
+    def description(self):
+        """
+        Verbose, multi-line description of what the plugin does. This can
+        contain simple html for formatting.
+        """
+        return """
+        Saves the session and renders the current frame range of the image
+        in chunks of frames, submitting one job per chunk.<br><br>
+
+        The jobs render a snapshot of the session taken at submission time,
+        so the session can keep being worked on while they run.<br><br>
+
+        By default the jobs run on this machine, a few at a time. Other
+        schedulers, ie. a render farm, can be configured by name.
+        """
+
+    @property
+    def item_filters(self):
+        """
+        List of item types that this plugin is interested in.
+
+        Only items matching entries in this list will be presented to the
+        accept() method. Strings can contain glob patters such as *, for
+        example ["clarisse.*", "file.clarisse"]
+        """
+        return ["clarisse.render_output"]
+
+    @property
+    def settings(self):
+        """
+        Dictionary defining the settings that this plugin expects to receive
+        through the settings parameter in the accept, validate, publish and
+        finalize methods.
+
+        A dictionary on the following form::
+
+            {
+                "Settings Name": {
+                    "type": "settings_type",
+                    "default": "default_value",
+                    "description": "One line description of the setting"
+            }
+
+        The type string should be one of the data types that toolkit accepts as
+        part of its environment configuration.
+        """
+        return {
+            "Frames Per Chunk": {
+                "type": "int",
+                "default": 10,
+                "description": "Number of frames rendered by each job.",
+            },
+            "Scheduler": {
+                "type": "str",
+                "default": "local",
+                "description": "Scheduler the jobs are submitted to, either "
+                "the name of a registered one, ie. local, or the path to a "
+                "scheduler class, ie. studio.farm:FarmScheduler.",
+            },
+            "Max Local Processes": {
+                "type": "int",
+                "default": 2,
+                "description": "Maximum number of jobs the local scheduler "
+                "runs at the same time.",
+            },
+            "Snapshot Folder": {
+                "type": "str",
+                "default": "",
+                "description": "Folder the snapshots of the session rendered "
+                "by the jobs are written to, which the machines running them "
+                "must be able to read. Next to the session when empty, so "
+                "paths relative to the project ($PDIR) still resolve.",
+            },
+        }
+
+    def accept(self, settings, item):
+        """
+        Method called by the publisher to determine if an item is of any
+        interest to this plugin. Only items matching the filters defined via
+        the item_filters property will be presented to this method.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+
+        :returns: dictionary with boolean keys accepted, required and enabled
+        """
+
+        # renders are only submitted when the artist asks for them
+        return {"accepted": True, "checked": False}
+
+    def validate(self, settings, item):
+        """
+        Validates the given item to check that it is ok to publish.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+
+        :returns: True if item is valid, False otherwise.
+        """
+
+        publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
+
+        if not _session_path():
+            error_msg = "The Clarisse session has not been saved."
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        if not tk_clarisse.get_cnode_path():
+            error_msg = (
+                "Could not find cnode to render, set CLARISSE_BIN_DIR to the "
+                "Clarisse installation folder."
+            )
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+        # fail early on schedulers that can not be found
+        self._get_scheduler(settings)
+
+        return True
+
+    def publish(self, settings, item):
+        """
+        Executes the publish logic for the given item and settings.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+        """
+
+        publisher = self.parent
+        tk_clarisse = publisher.engine.import_module("tk_clarisse")
+
+        snapshot_path = self._get_session_snapshot(settings, item)
+        image_name = item.properties["node_name"]
+        frame_range = ix.application.get_current_frame_range()
+        chunks = tk_clarisse.split_frame_range(
+            frame_range[0],
+            frame_range[1],
+            settings.get("Frames Per Chunk").value,
+        )
+
+        log_folder = _get_log_folder()
+        self._remove_old_files(log_folder)
+        log_name = re.sub(r"[^0-9a-zA-Z_]", "_", image_name.rsplit("/", 1)[-1])
+
+        cnode_path = tk_clarisse.get_cnode_path()
+        jobs = []
+        for (first_frame, last_frame) in chunks:
+            jobs.append(
+                tk_clarisse.RenderJob(
+                    "%s %d-%d" % (image_name, first_frame, last_frame),
+                    tk_clarisse.get_render_command(
+                        cnode_path,
+                        snapshot_path,
+                        image_name,
+                        first_frame,
+                        last_frame,
+                    ),
+                    log_path=os.path.join(
+                        log_folder,
+                        "%s_%d-%d_%d.log"
+                        % (log_name, first_frame, last_frame, time.time()),
+                    ),
+                )
+            )
+
+        scheduler = self._get_scheduler(settings)
+        item.properties["render_job_ids"] = scheduler.submit(jobs)
+
+        self.logger.info(
+            "Submitted %d jobs rendering frames %d-%d of %s to the %s "
+            "scheduler."
+            % (
+                len(jobs),
+                chunks[0][0],
+                chunks[-1][1],
+                image_name,
+                settings.get("Scheduler").value,
+            )
+        )
+        self.logger.debug("Render logs are written to %s" % (log_folder,))
+
+    def finalize(self, settings, item):
+        """
+        Execute the finalization pass. This pass executes once
+        all the publish tasks have completed, and can for example
+        be used to version up files.
+
+        :param settings: Dictionary of Settings. The keys are strings, matching
+                         the keys returned in the settings property.
+                         The values are `Setting` instances.
+        :param item: Item to process
+        """
+        pass
+
+    def _get_scheduler(self, settings):
+        """
+        Returns the scheduler configured in the settings.
+        """
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+        return tk_clarisse.get_scheduler(
+            settings.get("Scheduler").value,
+            self.logger,
+            max_processes=settings.get("Max Local Processes").value,
+        )
+
+    def _get_session_snapshot(self, settings, item):
+        """
+        Saves the session if needed and returns the path to a copy of it for
+        the jobs to render, shared by all the render outputs submitted
+        together.
+        """
+
+        session_item = item.parent
+        snapshot_path = session_item.properties.get("render_snapshot_path")
+        if snapshot_path:
+            return snapshot_path
+
+        tk_clarisse = self.parent.engine.import_module("tk_clarisse")
+
+        path = _session_path()
+        if tk_clarisse.is_session_modified():
+            with disabled_updates():
+                ix.application.save_project(path)
+
+        # next to the session by default, so paths relative to the project
+        # still resolve, and the machines running the jobs can read it
+        snapshot_folder = settings.get("Snapshot Folder").value
+        if not snapshot_folder:
+            snapshot_folder = os.path.dirname(path)
+        ensure_folder_exists(snapshot_folder)
+
+        (root, ext) = os.path.splitext(os.path.basename(path))
+        self._remove_old_files(
+            snapshot_folder,
+            re.compile(
+                r"%s_render_\d{8}_\d{6}%s\Z" % (re.escape(root), re.escape(ext))
+            ),
+        )
+        snapshot_path = os.path.join(
+            snapshot_folder,
+            "%s_render_%s%s" % (root, time.strftime("%Y%m%d_%H%M%S"), ext),
+        )
+
+        # copied in the background, keeping Clarisse responsive meanwhile
+        session_copy = tk_clarisse.BackgroundCopy(
+            path, snapshot_path, self.logger, remove_source=False
+        )
+        session_copy.start().wait()
+        self.logger.debug(
+            "Snapshot of the session saved to %s using %s."
+            % (snapshot_path, session_copy.strategy)
+        )
+
+        session_item.properties["render_snapshot_path"] = snapshot_path
+        return snapshot_path
+
+    def _remove_old_files(self, folder, name_regex=None):
+        """
+        Removes the session snapshots or logs of renders submitted long ago,
+        which their jobs are done with.
+
+        :param str folder: Folder to remove the files from.
+        :param name_regex: Optional compiled regular expression the names of
+            the files removed must match, so nothing else in a work area is
+            ever removed.
+        """
+        now = time.time()
+        for name in os.listdir(folder):
+            if name_regex is not None and not name_regex.match(name):
+                continue
+
+            old_path = os.path.join(folder, name)
+            try:
+                if now - os.path.getmtime(old_path) > SNAPSHOT_MAX_AGE:
+                    os.remove(old_path)
+            except OSError as e:
+                self.logger.debug(
+                    "Could not remove old render file %s: %s" % (old_path, e)
+                )
+
+
+def _get_log_folder():
+    """
+    Returns the local folder the logs of the renders are written to.
+    """
+    log_folder = os.path.join(tempfile.gettempdir(), "tk-clarisse", "renders")
+    ensure_folder_exists(log_folder)
+    return log_folder
+
+
+def _session_path():
+    """
+    Return the path to the current session
+    :return:
+    """
+    path = ix.application.get_current_project_filename()
+
+    if isinstance(path, unicode):
+        path = path.encode("utf-8")
+
+    return path
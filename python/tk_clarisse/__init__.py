@@ -8,4 +8,53 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
-from .menu_generation import MenuGenerator
+from .menu_generation import MenuGenerator, get_command_stats
+from .command_stats import CommandStats
+from .scene_scan import (
+    scan_scene,
+    walk_contexts,
+    is_reference,
+    SceneScan,
+    SceneFile,
+    FILE_CLASSES,
+)
+from .file_classes import load_file_classes, discover_file_classes
+from .scene_index import SceneFileIndex
+from .file_sequences import (
+    is_sequence_path,
+    normalize_sequence_path,
+    group_by_sequence,
+)
+from .scene_update import update_file_attributes, suspended_updates
+from .template_filter import TemplatePathFilter
+from .publish_dependencies import resolve_published_files
+from .publish_cache import PublishedFileCache
+from .work_versions import WorkFileVersions, list_files
+from .session_io import BackgroundCopy, get_scratch_path, copy_file
+from .session_fingerprint import SessionFingerprints, is_session_modified
+from .validation_cache import ValidationCache
+from .context_cache import ContextCache
+from .render_sequences import (
+    ImageSequence,
+    find_image_sequences,
+    format_frame_ranges,
+)
+from .child_processes import (
+    split_frame_range,
+    get_cnode_path,
+    run_child_processes,
+)
+from .alembic_export import (
+    export_alembic,
+    get_export_command,
+    get_chunk_path,
+    get_chunks_path,
+)
+from .render_jobs import (
+    RenderJob,
+    Scheduler,
+    LocalProcessScheduler,
+    get_render_command,
+    get_scheduler,
+    register_scheduler,
+)
@@ -0,0 +1,105 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Export of Clarisse items to Alembic, in the running session or in headless
+cnode processes, one per chunk of frames.
+
+This module only depends on the Clarisse api so that cnode can run it as a
+script, see :func:`get_export_command`.
+"""
+
+import os
+
+import ix
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# environment variables used to pass the export arguments to cnode
+ITEMS_ENV = "TK_CLARISSE_ABC_ITEMS"
+PATH_ENV = "TK_CLARISSE_ABC_PATH"
+FIRST_FRAME_ENV = "TK_CLARISSE_ABC_FIRST_FRAME"
+LAST_FRAME_ENV = "TK_CLARISSE_ABC_LAST_FRAME"
+
+
+def export_alembic(item_names, path, first_frame, last_frame):
+    """
+    Exports the given items to an Alembic file.
+
+    :param item_names: Full names of the contexts or objects to export.
+    :param str path: Path to the Alembic file to write.
+    :param int first_frame: First frame to export.
+    :param int last_frame: Last frame to export, included.
+    """
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    items = ix.api.OfItemArray(len(item_names))
+    for i, item_name in enumerate(item_names):
+        items[i] = ix.get_item(item_name)
+
+    options = ix.api.AbcExportOptions(ix.application)
+    options.filename = path
+    options.frame_range = ix.api.GMathVec2d(first_frame, last_frame)
+    options.export_items = items
+    ix.api.IOHelpers.export_to_alembic(options)
+
+
+def get_export_command(
+    cnode_path, project_path, item_names, path, first_frame, last_frame
+):
+    """
+    Returns the command to export the given items in a cnode process, to be
+    run with :func:`run_child_processes`.
+
+    :returns: Tuple of (args, env).
+    """
+    script_path = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+    args = [cnode_path, project_path, "-script", script_path]
+    env = {
+        # item names contain colons, ie. project://scene/geometry
+        ITEMS_ENV: "\n".join(item_names),
+        PATH_ENV: path,
+        FIRST_FRAME_ENV: str(first_frame),
+        LAST_FRAME_ENV: str(last_frame),
+    }
+    return (args, env)
+
+
+def get_chunk_path(path, first_frame):
+    """
+    Returns the path of the chunk starting at the given frame of an export,
+    ie. cache.abc -> cache.1001.abc, so the chunks form a sequence.
+    """
+    (root, ext) = os.path.splitext(path)
+    return "%s.%04d%s" % (root, first_frame, ext)
+
+
+def get_chunks_path(path):
+    """
+    Returns the path representing all the chunks of an export,
+    ie. cache.abc -> cache.%04d.abc
+    """
+    (root, ext) = os.path.splitext(path)
+    return "%s.%%04d%s" % (root, ext)
+
+
+if __name__ == "__main__":
+    # running in cnode, see get_export_command
+    export_alembic(
+        os.environ[ITEMS_ENV].split("\n"),
+        os.environ[PATH_ENV],
+        int(os.environ[FIRST_FRAME_ENV]),
+        int(os.environ[LAST_FRAME_ENV]),
+    )
@@ -0,0 +1,144 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helpers to split work by frames and run it in headless Clarisse processes.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+from tank import TankError
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def split_frame_range(first_frame, last_frame, chunk_size):
+    """
+    Splits a frame range in chunks of at most chunk_size frames.
+
+    :param int first_frame: First frame of the range.
+    :param int last_frame: Last frame of the range, included.
+    :param int chunk_size: Frames per chunk, if 0 or less the whole range is
+        a single chunk.
+    :returns: List of (first_frame, last_frame) tuples.
+    """
+    first_frame, last_frame = int(first_frame), int(last_frame)
+    if chunk_size <= 0:
+        return [(first_frame, last_frame)]
+
+    return [
+        (start, min(start + chunk_size - 1, last_frame))
+        for start in range(first_frame, last_frame + 1, chunk_size)
+    ]
+
+
+def get_cnode_path():
+    """
+    Returns the path to cnode, the command line version of Clarisse, next to
+    the running Clarisse executable or in CLARISSE_BIN_DIR.
+    """
+    executable = "cnode.exe" if sys.platform == "win32" else "cnode"
+
+    folders = [os.path.dirname(sys.executable)]
+    if "CLARISSE_BIN_DIR" in os.environ:
+        folders.insert(0, os.environ["CLARISSE_BIN_DIR"])
+
+    for folder in folders:
+        path = os.path.join(folder, executable)
+        if os.path.exists(path):
+            return path
+
+    return None
+
+
+def run_child_processes(
+    commands, max_processes, logger, wait_fn=None, poll_interval=0.2
+):
+    """
+    Runs the given commands, at most max_processes at the same time, and
+    waits for all of them to finish.
+
+    :param commands: List of (args, env) tuples, env being the extra
+        environment variables of the process.
+    :param int max_processes: Maximum number of processes running at once.
+    :param logger: Logger to report to.
+    :param wait_fn: Optional callable invoked while waiting, ie. to keep the
+        application responsive.
+    :param poll_interval: Seconds between checks of the running processes.
+    :returns: List of the output of each command, in the same order.
+    :raises: TankError if any of the commands failed.
+    """
+    pending = list(enumerate(commands))
+    running = {}
+    outputs = [None] * len(commands)
+    failed = []
+
+    while pending or running:
+        while pending and len(running) < max(1, max_processes):
+            (index, (args, env)) = pending.pop(0)
+            process_env = os.environ.copy()
+            process_env.update(env or {})
+            logger.debug("Starting: %s" % subprocess.list2cmdline(args))
+
+            # a file, as a pipe nobody reads would block a chatty process
+            output_file = tempfile.TemporaryFile()
+            running[index] = (
+                subprocess.Popen(
+                    args,
+                    env=process_env,
+                    stdout=output_file,
+                    stderr=subprocess.STDOUT,
+                ),
+                output_file,
+                time.time(),
+            )
+
+        for index, (process, output_file, start) in list(running.items()):
+            if process.poll() is None:
+                continue
+
+            del running[index]
+            output_file.seek(0)
+            outputs[index] = output_file.read().decode("utf-8", "replace")
+            output_file.close()
+            logger.debug(
+                "Process %d of %d finished in %.2fs with exit code %d."
+                % (index + 1, len(commands), time.time() - start,
+                   process.returncode)
+            )
+            if process.returncode:
+                failed.append(index)
+
+        if wait_fn:
+            wait_fn()
+        if running:
+            time.sleep(poll_interval)
+
+    if failed:
+        raise TankError(
+            "%d of %d processes failed:\n%s"
+            % (
+                len(failed),
+                len(commands),
+                "\n".join(
+                    "%s\n%s"
+                    % (subprocess.list2cmdline(commands[i][0]), outputs[i])
+                    for i in failed
+                ),
+            )
+        )
+
+    return outputs
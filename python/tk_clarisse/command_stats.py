@@ -0,0 +1,186 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Timing statistics of the commands run from the Shotgun menu.
+"""
+
+import sys
+import csv
+import json
+import threading
+from collections import deque
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# columns of the report, in order
+REPORT_FIELDS = (
+    "app",
+    "command",
+    "calls",
+    "failures",
+    "total_ms",
+    "mean_ms",
+    "p50_ms",
+    "p90_ms",
+    "p99_ms",
+    "max_ms",
+)
+
+
+def _encode(value):
+    """
+    Returns unicode values as utf-8 byte strings, leaves the others as they
+    are.
+    """
+    if sys.version_info[0] < 3 and isinstance(value, unicode):
+        return value.encode("utf-8")
+    return value
+
+
+def _percentile(sorted_values, percent):
+    """
+    Returns the nearest-rank percentile of a sorted list of values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class CommandStats(object):
+    """
+    Calls, failures and durations of the commands run, per app and command.
+
+    Only the latest max_samples durations of each command are kept to work
+    out the percentiles, the totals cover all the calls.
+    """
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._commands = {}
+        self._lock = threading.Lock()
+
+    def record(self, app_name, command_name, seconds, failed=False):
+        """
+        Records a call to a command.
+
+        :param str app_name: Name of the app of the command, or None for
+            the commands not registered by an app.
+        :param str command_name: Name of the command.
+        :param float seconds: Duration of the call.
+        :param bool failed: Whether the call raised an exception.
+        """
+        key = (app_name or "Other Items", command_name)
+        with self._lock:
+            command = self._commands.get(key)
+            if command is None:
+                command = {
+                    "calls": 0,
+                    "failures": 0,
+                    "total": 0.0,
+                    "samples": deque(maxlen=self.max_samples),
+                }
+                self._commands[key] = command
+
+            command["calls"] += 1
+            command["failures"] += int(failed)
+            command["total"] += seconds
+            command["samples"].append(seconds)
+
+    def clear(self):
+        """
+        Forgets all the recorded calls.
+        """
+        with self._lock:
+            self._commands.clear()
+
+    def report(self):
+        """
+        Returns the statistics of each command, slowest in total first.
+
+        :returns: List of dictionaries with the keys in REPORT_FIELDS, in
+            milliseconds.
+        """
+        with self._lock:
+            commands = [
+                (key, dict(command, samples=sorted(command["samples"])))
+                for (key, command) in self._commands.items()
+            ]
+
+        rows = []
+        for ((app_name, command_name), command) in commands:
+            samples = command["samples"]
+            row = {
+                "app": app_name,
+                "command": command_name,
+                "calls": command["calls"],
+                "failures": command["failures"],
+                "total_ms": command["total"],
+                "mean_ms": command["total"] / command["calls"],
+                "p50_ms": _percentile(samples, 50),
+                "p90_ms": _percentile(samples, 90),
+                "p99_ms": _percentile(samples, 99),
+                "max_ms": samples[-1],
+            }
+            for field in REPORT_FIELDS:
+                if field.endswith("_ms"):
+                    row[field] = round(row[field] * 1000, 3)
+            rows.append(row)
+
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def format_report(self):
+        """
+        Returns the report as text, one line per command.
+        """
+        lines = []
+        for row in self.report():
+            lines.append(
+                "%(app)s | %(command)s: %(calls)d calls, %(failures)d failed, "
+                "%(total_ms).0fms total, p50 %(p50_ms).0fms, "
+                "p90 %(p90_ms).0fms, max %(max_ms).0fms" % row
+            )
+        return "\n".join(lines)
+
+    def save(self, path):
+        """
+        Saves the report to a file, as JSON if the path ends in .json and as
+        CSV otherwise.
+        """
+        rows = self.report()
+        if path.lower().endswith(".json"):
+            with open(path, "w") as report_file:
+                json.dump(rows, report_file, indent=2)
+            return
+
+        # the csv module writes its own line endings, so the file must not
+        # translate them, or rows are separated by blank lines on windows
+        if sys.version_info[0] < 3:
+            report_file = open(path, "wb")
+            # and it only writes byte strings in python 2
+            rows = [
+                dict(
+                    (key, _encode(value)) for (key, value) in row.items()
+                )
+                for row in rows
+            ]
+        else:
+            report_file = open(path, "w", newline="")
+
+        with report_file:
+            writer = csv.DictWriter(report_file, REPORT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
@@ -0,0 +1,197 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache of the toolkit instances and contexts resolved for the work areas of
+the sessions saved and loaded.
+"""
+
+import os
+from collections import OrderedDict
+
+import tank
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# maximum number of work areas kept, least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 32
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _context_key(context):
+    """
+    Returns a hashable representation of a context, as contexts can not be
+    used as keys.
+    """
+    if context is None:
+        return None
+
+    def entity_key(entity):
+        if not entity:
+            return None
+        return (entity.get("type"), entity.get("id"))
+
+    return (
+        entity_key(context.project),
+        entity_key(context.entity),
+        entity_key(context.step),
+        entity_key(context.task),
+        entity_key(context.user),
+    )
+
+
+def get_path_cache_location(tk):
+    """
+    Returns the path to the path cache database of a pipeline configuration,
+    resolved through the cache_location core hook the same way the toolkit
+    path cache does.
+    """
+    pipeline_config = tk.pipeline_configuration
+    return tk.execute_core_hook_method(
+        "cache_location",
+        "path_cache",
+        project_id=pipeline_config.get_project_id(),
+        pipeline_configuration_id=pipeline_config.get_shotgun_id(),
+    )
+
+
+def get_config_stamp(tk, path_cache_location=None):
+    """
+    Returns the modification times of the files the contexts of a pipeline
+    configuration are resolved from: the templates, the storage roots and
+    the path cache, updated whenever folders are created.
+
+    :param tk: Toolkit instance.
+    :param str path_cache_location: Path to the path cache database, resolved
+        from the toolkit instance if not given.
+    """
+    if path_cache_location is None:
+        path_cache_location = get_path_cache_location(tk)
+
+    core_folder = os.path.join(
+        tk.pipeline_configuration.get_config_location(), "core"
+    )
+    paths = [
+        os.path.join(core_folder, "templates.yml"),
+        os.path.join(core_folder, "roots.yml"),
+        path_cache_location,
+    ]
+
+    return tuple(_get_mtime(path) for path in paths)
+
+
+class ContextCache(object):
+    """
+    Least recently used map of work area to the toolkit instance and context
+    resolved for the sessions in it.
+
+    Sessions in the same folder always resolve to the same context, so saving
+    or reopening a session in a known work area does not need to walk the
+    pipeline configuration or query Shotgun again. Entries are invalidated
+    when the configuration they were resolved with changes or new folders are
+    created for it.
+    """
+
+    def __init__(self, logger, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Constructor.
+
+        :param logger: Logger to report to.
+        :param int max_entries: Maximum number of work areas kept.
+        """
+        self.logger = logger
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # pipeline configuration path -> path cache location, as resolving
+        # it runs a core hook
+        self._path_cache_locations = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_context(self, path, previous_context, current_tk):
+        """
+        Returns the toolkit instance and context for a session, resolving
+        them only if its work area has not been resolved before.
+
+        :param str path: Path to the session.
+        :param previous_context: Context the engine is in, used to fill in
+            what the path does not define, ie. the task.
+        :param current_tk: Toolkit instance the engine is running with.
+        :returns: Tuple of (tk, context).
+        :raises: TankError if the path can not be resolved.
+        """
+        key = (
+            os.path.normcase(os.path.dirname(path)),
+            current_tk.pipeline_configuration.get_path(),
+            _context_key(previous_context),
+        )
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            (tk, context, stamp) = entry
+            if stamp == self._get_config_stamp(tk):
+                self.logger.debug(
+                    "Using the cached context for %s: %s" % (path, context)
+                )
+                self._entries[key] = entry
+                return (tk, context)
+
+        # this file could be in another project altogether, so create a new
+        # API instance.
+        tk = tank.tank_from_path(path)
+        # taken before resolving, so changes made meanwhile invalidate it
+        stamp = self._get_config_stamp(tk)
+        context = tk.context_from_path(path, previous_context)
+
+        if stamp is not None:
+            self._entries[key] = (tk, context, stamp)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return (tk, context)
+
+    def invalidate(self):
+        """
+        Forgets all the cached contexts.
+        """
+        self._entries.clear()
+
+    def _get_config_stamp(self, tk):
+        """
+        Returns the stamp of the configuration of the given toolkit instance,
+        or None if its path cache can not be found, in which case its
+        contexts are not cached as they could not be invalidated.
+        """
+        config_path = tk.pipeline_configuration.get_path()
+        if config_path not in self._path_cache_locations:
+            try:
+                location = get_path_cache_location(tk)
+            except Exception as e:
+                self.logger.debug(
+                    "Not caching the contexts of %s, could not find its path "
+                    "cache: %s" % (config_path, e)
+                )
+                location = None
+            self._path_cache_locations[config_path] = location
+
+        location = self._path_cache_locations[config_path]
+        if location is None:
+            return None
+        return get_config_stamp(tk, location)
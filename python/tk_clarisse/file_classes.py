@@ -0,0 +1,136 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Discovery of the Clarisse classes that have attributes pointing to files.
+
+Discovering the classes requires going through every class registered in
+Clarisse which is too slow to do every session, so the result is cached on
+disk per Clarisse build.
+"""
+
+import os
+import json
+import traceback
+
+import ix
+
+from sgtk.util.filesystem import ensure_folder_exists
+
+from .scene_scan import FILE_CLASSES, FILENAME_ATTR
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# renamed whenever the discovery changes, so older results are not reused
+CACHE_FILE_NAME = "file_classes_v2.json"
+
+
+def default_file_classes():
+    """
+    Returns the hard coded file classes, used when the classes could not be
+    discovered.
+
+    :returns: Dictionary of class name to list of file attribute names.
+    """
+    return dict((class_name, [FILENAME_ATTR]) for class_name in FILE_CLASSES)
+
+
+def discover_file_classes():
+    """
+    Goes through the classes registered in Clarisse and finds the ones that
+    have attributes meant to hold the paths of files they read, ie. the ones
+    that show a file open browser in the attribute editor. Attributes holding
+    the paths the items write to, ie. render outputs, are not dependencies.
+
+    :returns: Dictionary of class name to list of file attribute names.
+    """
+    file_hint = ix.api.OfAttr.VISUAL_HINT_FILENAME_OPEN
+
+    file_classes = {}
+    classes = ix.application.get_factory().get_classes()
+    for i in range(classes.get_count()):
+        cls = classes.get(i)
+
+        attr_names = []
+        for j in range(cls.get_attribute_count()):
+            attr = cls.get_attribute(j)
+            if attr.get_visual_hint() == file_hint:
+                attr_names.append(attr.get_name())
+
+        if attr_names:
+            file_classes[cls.get_name()] = attr_names
+
+    return file_classes
+
+
+def load_file_classes(cache_folder, logger):
+    """
+    Returns the classes with file attributes for the running Clarisse build,
+    discovering them only if they have not been cached already.
+
+    :param str cache_folder: Folder where the cache file is stored.
+    :param logger: Logger to report to.
+    :returns: Dictionary of class name to list of file attribute names.
+    """
+    version = ix.application.get_version()
+    cache_path = os.path.join(cache_folder, CACHE_FILE_NAME)
+
+    cached = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r") as cache_file:
+                cached = json.load(cache_file)
+        except Exception:
+            logger.debug(
+                "Ignoring unreadable file classes cache %s: %s"
+                % (cache_path, traceback.format_exc())
+            )
+            cached = {}
+
+    if version in cached:
+        return cached[version]
+
+    logger.debug("Discovering file classes for Clarisse %s..." % version)
+    try:
+        file_classes = discover_file_classes()
+    except Exception:
+        # cached as well, so the discovery is not attempted every session
+        logger.warning(
+            "Could not discover the Clarisse classes with file attributes, "
+            "using the default ones: %s" % traceback.format_exc()
+        )
+        file_classes = {}
+
+    # make sure the well known classes are never missed
+    for class_name, attr_names in default_file_classes().items():
+        for attr_name in attr_names:
+            class_attrs = file_classes.setdefault(class_name, [])
+            if attr_name not in class_attrs:
+                class_attrs.append(attr_name)
+
+    cached[version] = file_classes
+    try:
+        ensure_folder_exists(cache_folder)
+        with open(cache_path, "w") as cache_file:
+            json.dump(cached, cache_file)
+    except Exception:
+        logger.debug(
+            "Could not write file classes cache %s: %s"
+            % (cache_path, traceback.format_exc())
+        )
+
+    logger.debug(
+        "Found %d classes with file attributes in Clarisse %s."
+        % (len(file_classes), version)
+    )
+    return file_classes
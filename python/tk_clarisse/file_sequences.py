@@ -0,0 +1,95 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helpers to deal with paths representing several files, ie. frame sequences
+or udim textures.
+"""
+
+import os
+import re
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# paths containing any of these tokens point to several files on disk. The
+# @ and printf tokens can be part of ordinary names, ie. asset@lookdev.abc
+# or 100%done.exr, so they need to stand on their own between separators or
+# before the extension.
+SEQUENCE_TOKEN_REGEX = re.compile(
+    r"(?P<hash>#+)"
+    r"|(?<=[._/\\])(?P<at>@+)(?=[._]|\Z)"
+    r"|(?<=[._/\\])(?P<printf>%0?(?P<printf_padding>\d*)d)(?=[._]|\Z)"
+    r"|(?P<houdini>\$F(?P<houdini_padding>\d*)(?![A-Za-z_]))"
+    r"|(?P<udim><udim>)",
+    re.IGNORECASE,
+)
+
+
+def is_sequence_path(path):
+    """
+    Returns True if the given path contains frame or udim tokens.
+    """
+    return SEQUENCE_TOKEN_REGEX.search(path) is not None
+
+
+def _normalize_token(match):
+    """
+    Returns the canonical form of a frame or udim token.
+    """
+    if match.group("udim"):
+        return "<UDIM>"
+
+    if match.group("hash"):
+        padding = len(match.group("hash"))
+    elif match.group("at"):
+        padding = len(match.group("at"))
+    elif match.group("printf"):
+        padding = int(match.group("printf_padding") or 1)
+    else:
+        padding = int(match.group("houdini_padding") or 1)
+
+    return "%%0%dd" % padding
+
+
+def normalize_sequence_path(path):
+    """
+    Returns a key identifying the files a path points to, so that different
+    spellings of the same sequence, ie. 'tex.####.exr', 'tex.%04d.exr' or
+    'tex.$F4.exr', or of the same file, compare equal.
+
+    :param str path: Path to normalize.
+    :returns: Normalized path.
+    """
+    path = os.path.normcase(os.path.normpath(path.replace("\\", "/")))
+    return SEQUENCE_TOKEN_REGEX.sub(_normalize_token, path)
+
+
+def group_by_sequence(items, get_path):
+    """
+    Groups items pointing to the same files on disk.
+
+    :param items: Sequence of items to group.
+    :param get_path: Callable returning the path of an item.
+    :returns: List of lists of items, in the order each sequence was first
+        found.
+    """
+    groups = {}
+    ordered = []
+    for item in items:
+        key = normalize_sequence_path(get_path(item))
+        if key not in groups:
+            groups[key] = []
+            ordered.append(groups[key])
+        groups[key].append(item)
+
+    return ordered
@@ -16,18 +16,32 @@ Menu handling for Clarisse
 import tank
 import sys
 import os
+import time
 import unicodedata
 import traceback
 
+from tank.log import LogManager
 from tank.platform.qt import QtGui, QtCore
 
 import ix
 
+from .command_stats import CommandStats
+
 
 __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 
+def get_command_stats():
+    """
+    Returns the :class:`CommandStats` of the commands run from the menu,
+    kept for the whole session so they outlive engine restarts.
+    """
+    if not hasattr(ix.shotgun, "command_stats"):
+        ix.shotgun.command_stats = CommandStats()
+    return ix.shotgun.command_stats
+
+
 class MenuGenerator(object):
     """
     Menu generation functionality for Clarisse
@@ -157,6 +171,10 @@ class MenuGenerator(object):
                 "Jump to File System", ctx_menu, self._jump_to_fs
             )
 
+        self._add_menu_item(
+            "Performance Report...", ctx_menu, self._performance_report
+        )
+
         # divider (apps may register entries below this divider)
         self._add_divider(ctx_menu)
 
@@ -194,6 +212,30 @@ class MenuGenerator(object):
             if exit_code != 0:
                 self._engine.logger.error("Failed to launch '%s'!", cmd)
 
+    def _performance_report(self):
+        """
+        Shows the timings of the commands run so far and saves them as CSV or
+        JSON.
+        """
+        command_stats = get_command_stats()
+        report = command_stats.format_report()
+        if not report:
+            self._engine.logger.info("No commands have been run yet.")
+            return
+
+        self._engine.logger.info("Commands run in this session:\n%s" % report)
+
+        path = os.path.join(
+            LogManager().log_folder,
+            "tk-clarisse-commands-%s.csv" % time.strftime("%Y%m%d_%H%M%S"),
+        )
+        path = QtGui.QFileDialog.getSaveFileName(
+            None, "Save Performance Report", path, "CSV (*.csv);;JSON (*.json)"
+        )[0]
+        if path:
+            command_stats.save(path)
+            self._engine.logger.info("Performance report saved to '%s'" % path)
+
     ###########################################################################
     # app menus
 
@@ -323,12 +365,17 @@ class AppCommand(object):
         otherwise have been swallowed by the deferred execution of the callback
         """
 
+        failed = False
+        start = None
         try:
             ix.application.check_for_events()
             ix.application.disable()
 
-            self.callback()
+            start = time.time()
+            with ix.shotgun.tracer.span(self.name, category="command"):
+                self.callback()
         except Exception:
+            failed = True
             (exc_type, exc_value, exc_traceback) = sys.exc_info()
             message = (
                 "Message: Shotgun encountered a problem excutin an action from"
@@ -341,9 +388,16 @@ class AppCommand(object):
             current_engine = tank.platform.current_engine()
             current_engine.logger.exception(message)
         finally:
+            if start is not None:
+                get_command_stats().record(
+                    self.get_app_name(),
+                    self.name,
+                    time.time() - start,
+                    failed=failed,
+                )
             ix.application.enable()
             ix.application.check_for_events()
-            
+
     def _find_sub_menu_item(self, parent_menu_name, menu_name):
         """
         Find the 'sub-menu' menu item with the given label
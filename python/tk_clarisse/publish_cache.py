@@ -0,0 +1,233 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Persistent cache of the published files found for paths on disk.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from sgtk.util.filesystem import ensure_folder_exists
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+CACHE_FILE_NAME = "published_files.db"
+
+# entries older than this are looked up again
+DEFAULT_TTL = 24 * 60 * 60
+
+# maximum number of entries kept, least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def normalize_path(path):
+    """
+    Returns the key used for a path in the cache.
+
+    Keys are always unicode, as sqlite rejects byte strings that are not
+    ascii, ie. utf-8 encoded paths with accents.
+    """
+    if isinstance(path, bytes):
+        path = path.decode("utf-8")
+    return os.path.normcase(os.path.normpath(path)).replace("\\", "/")
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class PublishedFileCache(object):
+    """
+    SQLite backed map of normalized path to the PublishedFile id, type and
+    version found for it.
+
+    Entries are invalidated when they are older than the configured time to
+    live or when the file on disk has been modified since it was cached, and
+    the least recently used entries are evicted to keep the cache bounded.
+    """
+
+    def __init__(
+        self, cache_path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES
+    ):
+        """
+        Constructor.
+
+        :param str cache_path: Path to the database file.
+        :param ttl: Seconds an entry is valid for.
+        :param max_entries: Maximum number of entries kept.
+        """
+        self._cache_path = cache_path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+        ensure_folder_exists(os.path.dirname(cache_path))
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS published_files ("
+                "path TEXT PRIMARY KEY, "
+                "entity_type TEXT, "
+                "entity_id INTEGER, "
+                "version_number INTEGER, "
+                "mtime REAL, "
+                "cached_at REAL, "
+                "last_access REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS published_files_last_access "
+                "ON published_files (last_access)"
+            )
+
+    @classmethod
+    def from_cache_folder(cls, cache_folder, **kwargs):
+        """
+        Returns a cache stored in the given folder, ie. the engine cache
+        location.
+        """
+        return cls(os.path.join(cache_folder, CACHE_FILE_NAME), **kwargs)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Yields a connection to the database, committing on success and
+        always closing it.
+        """
+        with self._lock:
+            connection = sqlite3.connect(self._cache_path, timeout=10)
+            try:
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+    def get_many(self, paths):
+        """
+        Returns the cached published files for the given paths.
+
+        :param paths: Iterable of paths.
+        :returns: Dictionary of path to entity dictionary, with id, type and
+            version_number, for the paths found and still valid.
+        """
+        keys = {}
+        for path in paths:
+            keys.setdefault(normalize_path(path), []).append(path)
+        if not keys:
+            return {}
+
+        now = time.time()
+        rows = []
+        with self._transaction() as connection:
+            key_list = list(keys)
+            # keep well under the sqlite limit of variables per query
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i : i + 500]
+                rows.extend(
+                    connection.execute(
+                        "SELECT path, entity_type, entity_id, "
+                        "version_number, mtime, cached_at "
+                        "FROM published_files WHERE path IN (%s)"
+                        % ",".join("?" * len(chunk)),
+                        chunk,
+                    ).fetchall()
+                )
+
+        found = {}
+        stale = []
+        for (key, entity_type, entity_id, version, mtime, cached_at) in rows:
+            if now - cached_at > self._ttl or _get_mtime(key) != mtime:
+                stale.append(key)
+                continue
+
+            for path in keys[key]:
+                found[path] = {
+                    "type": entity_type,
+                    "id": entity_id,
+                    "version_number": version,
+                }
+
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM published_files WHERE path = ?",
+                [(key,) for key in stale],
+            )
+            connection.executemany(
+                "UPDATE published_files SET last_access = ? WHERE path = ?",
+                [(now, normalize_path(path)) for path in found],
+            )
+
+        return found
+
+    def set_many(self, published_files):
+        """
+        Stores the published files found for some paths.
+
+        :param published_files: Dictionary of path to entity dictionary, with
+            at least id and type.
+        """
+        if not published_files:
+            return
+
+        now = time.time()
+        rows = []
+        for path, sg_data in published_files.items():
+            rows.append(
+                (
+                    normalize_path(path),
+                    sg_data["type"],
+                    sg_data["id"],
+                    sg_data.get("version_number"),
+                    _get_mtime(path),
+                    now,
+                    now,
+                )
+            )
+
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO published_files VALUES "
+                "(?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(connection)
+
+    def invalidate(self, paths):
+        """
+        Removes the given paths from the cache.
+        """
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM published_files WHERE path = ?",
+                [(normalize_path(path),) for path in paths],
+            )
+
+    def _evict(self, connection):
+        """
+        Removes the least recently used entries above the maximum size.
+        """
+        (count,) = connection.execute(
+            "SELECT COUNT(*) FROM published_files"
+        ).fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                "DELETE FROM published_files WHERE path IN ("
+                "SELECT path FROM published_files "
+                "ORDER BY last_access ASC LIMIT ?)",
+                (count - self._max_entries,),
+            )
@@ -0,0 +1,134 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Batched resolution of publish dependencies.
+"""
+
+import os
+
+import sgtk
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# maximum number of paths looked up in a single query
+PATHS_PER_QUERY = 200
+
+
+def _chunk_by_prefix(paths, chunk_size):
+    """
+    Splits the paths in chunks of at most chunk_size paths, keeping paths
+    that share a folder together so each query covers a small part of the
+    file system.
+    """
+    chunk = []
+    for path in sorted(paths, key=lambda p: (os.path.dirname(p), p)):
+        chunk.append(path)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _find_missing_published_files(tk, published_files):
+    """
+    Returns the paths of the given published files that no longer exist in
+    Shotgun, checked in a single query.
+
+    :param published_files: Dictionary of path to entity dictionary.
+    :returns: List of paths.
+    """
+    if not published_files:
+        return []
+
+    published_file_type = sgtk.util.get_published_file_entity_type(tk)
+    ids = set(sg_data["id"] for sg_data in published_files.values())
+    existing_ids = set(
+        sg_data["id"]
+        for sg_data in tk.shotgun.find(
+            published_file_type, [["id", "in", list(ids)]], ["id"]
+        )
+    )
+    return [
+        path
+        for (path, sg_data) in published_files.items()
+        if sg_data["id"] not in existing_ids
+    ]
+
+
+def resolve_published_files(
+    tk, paths, logger, cache=None, chunk_size=PATHS_PER_QUERY
+):
+    """
+    Finds the latest PublishedFile for each of the given paths, running one
+    query per chunk of paths instead of one per path.
+
+    :param tk: :class:`sgtk.Sgtk` instance.
+    :param paths: Iterable of paths.
+    :param logger: Logger to report to.
+    :param cache: Optional :class:`PublishedFileCache` to look the paths up in
+        before querying Shotgun, and to store the new results in.
+    :param chunk_size: Maximum number of paths looked up in a single query.
+    :returns: Dictionary of path to the PublishedFile entity dictionary, with
+        id, type and version_number. Paths without publishes are not
+        included.
+    """
+    paths = set(paths)
+
+    resolved = {}
+    if cache is not None:
+        resolved.update(cache.get_many(paths))
+
+        # published files can be deleted or retired while they are cached,
+        # and registering them as dependencies would fail the publish
+        missing = _find_missing_published_files(tk, resolved)
+        if missing:
+            logger.debug(
+                "Dropping %d cached published files that no longer exist."
+                % len(missing)
+            )
+            cache.invalidate(missing)
+            for path in missing:
+                del resolved[path]
+
+    queried = {}
+    query_count = 0
+    for chunk in _chunk_by_prefix(paths.difference(resolved), chunk_size):
+        queried.update(
+            sgtk.util.find_publish(
+                tk,
+                chunk,
+                fields=["id", "type", "version_number"],
+                only_current_project=False,
+            )
+        )
+        query_count += 1
+
+    if cache is not None:
+        cache.set_many(queried)
+    resolved.update(queried)
+
+    logger.debug(
+        "Resolved %d of %d paths to published files, %d from the cache and "
+        "%d in %d queries."
+        % (
+            len(resolved),
+            len(paths),
+            len(resolved) - len(queried),
+            len(queried),
+            query_count,
+        )
+    )
+    return resolved
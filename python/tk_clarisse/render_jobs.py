@@ -0,0 +1,235 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Submission of frame-chunked render jobs to pluggable schedulers.
+"""
+
+import os
+import uuid
+import threading
+import importlib
+import subprocess
+
+try:
+    import queue
+except ImportError:
+    # python 2
+    import Queue as queue
+
+from tank import TankError
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def get_render_command(
+    cnode_path, project_path, image_name, first_frame, last_frame
+):
+    """
+    Returns the cnode arguments to render the given frames of an image.
+    """
+    return [
+        cnode_path,
+        project_path,
+        "-image",
+        image_name,
+        "-start_frame",
+        str(first_frame),
+        "-end_frame",
+        str(last_frame),
+    ]
+
+
+class RenderJob(object):
+    """
+    A command rendering a chunk of frames.
+
+    - name: name of the job, for display.
+    - args: command line arguments of the job.
+    - env: extra environment variables of the job.
+    - log_path: optional path to write the output of the job to.
+    """
+
+    def __init__(self, name, args, env=None, log_path=None):
+        self.name = name
+        self.args = args
+        self.env = env or {}
+        self.log_path = log_path
+
+    def __repr__(self):
+        return "<RenderJob %s>" % (self.name,)
+
+
+class Scheduler(object):
+    """
+    Interface of the schedulers render jobs are submitted to.
+
+    Schedulers are created with the options configured for them, and need to
+    implement submit and get_status. See :func:`register_scheduler` to make a
+    scheduler available by name.
+    """
+
+    def __init__(self, logger, **options):
+        """
+        Constructor.
+
+        :param logger: Logger to report to.
+        :param options: Scheduler specific options.
+        """
+        self.logger = logger
+        self.options = options
+
+    def submit(self, jobs):
+        """
+        Submits the given jobs, returning without waiting for them.
+
+        :param jobs: List of :class:`RenderJob`.
+        :returns: List of the ids of the submitted jobs.
+        """
+        raise NotImplementedError()
+
+    def get_status(self, job_id):
+        """
+        Returns the state of a submitted job, one of JOB_QUEUED, JOB_RUNNING,
+        JOB_DONE or JOB_FAILED.
+        """
+        raise NotImplementedError()
+
+
+class LocalProcessScheduler(Scheduler):
+    """
+    Runs the jobs as child processes of this machine, a fixed number of them
+    at a time, in background threads so the session is not blocked.
+
+    Options:
+
+    - max_processes: Maximum number of jobs running at the same time.
+    """
+
+    def __init__(self, logger, max_processes=2, **options):
+        super(LocalProcessScheduler, self).__init__(
+            logger, max_processes=max_processes, **options
+        )
+        self._queue = queue.Queue()
+        self._status = {}
+        self._lock = threading.Lock()
+
+        for _ in range(max(1, max_processes)):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+
+    def submit(self, jobs):
+        job_ids = []
+        for job in jobs:
+            job_id = uuid.uuid4().hex
+            with self._lock:
+                self._status[job_id] = JOB_QUEUED
+            self._queue.put((job_id, job))
+            job_ids.append(job_id)
+        return job_ids
+
+    def get_status(self, job_id):
+        with self._lock:
+            return self._status[job_id]
+
+    def _set_status(self, job_id, status):
+        with self._lock:
+            self._status[job_id] = status
+
+    def _work(self):
+        while True:
+            (job_id, job) = self._queue.get()
+            self._set_status(job_id, JOB_RUNNING)
+            try:
+                self._set_status(
+                    job_id, JOB_DONE if self._run(job) == 0 else JOB_FAILED
+                )
+            except Exception as e:
+                self.logger.error("Could not run %s: %s" % (job.name, e))
+                self._set_status(job_id, JOB_FAILED)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        env = os.environ.copy()
+        env.update(job.env)
+
+        output_file = open(job.log_path, "wb") if job.log_path else None
+        try:
+            return subprocess.call(
+                job.args,
+                env=env,
+                stdout=output_file,
+                stderr=subprocess.STDOUT if output_file else None,
+            )
+        finally:
+            if output_file:
+                output_file.close()
+
+
+# scheduler name -> scheduler class
+SCHEDULERS = {"local": LocalProcessScheduler}
+
+# schedulers already created, by name and options, so jobs keep going to the
+# same queues while the options do not change
+_scheduler_instances = {}
+
+
+def register_scheduler(name, scheduler_class):
+    """
+    Makes a scheduler class available by name to :func:`get_scheduler`.
+    """
+    SCHEDULERS[name] = scheduler_class
+
+
+def get_scheduler(name, logger, **options):
+    """
+    Returns the scheduler with the given name and options, creating it the
+    first time they are asked for.
+
+    :param str name: Name of a registered scheduler, or path to a scheduler
+        class in an importable module, ie. "studio.farm:FarmScheduler".
+    :param logger: Logger to report to.
+    :param options: Options to create the scheduler with.
+    :returns: :class:`Scheduler` instance.
+    :raises: TankError if the scheduler can not be found.
+    """
+    key = (name, tuple(sorted(options.items())))
+    if key in _scheduler_instances:
+        return _scheduler_instances[key]
+
+    scheduler_class = SCHEDULERS.get(name)
+    if scheduler_class is None and ":" in name:
+        (module_name, class_name) = name.split(":", 1)
+        try:
+            module = importlib.import_module(module_name)
+            scheduler_class = getattr(module, class_name)
+        except (ImportError, AttributeError) as e:
+            raise TankError("Could not load scheduler %s: %s" % (name, e))
+
+    if scheduler_class is None:
+        raise TankError(
+            "Unknown scheduler %s, available ones are: %s"
+            % (name, ", ".join(sorted(SCHEDULERS)))
+        )
+
+    scheduler = scheduler_class(logger, **options)
+    _scheduler_instances[key] = scheduler
+    return scheduler
@@ -0,0 +1,227 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Detection of the frames rendered to disk for image outputs.
+"""
+
+import os
+import re
+
+from .file_sequences import SEQUENCE_TOKEN_REGEX, _normalize_token
+from .work_versions import list_files
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+class ImageSequence(object):
+    """
+    Frames found on disk for an image output.
+
+    - path: path to the output, with the frame token as %0Nd.
+    - frames: sorted list of the frame numbers found.
+    - padding: minimum number of digits of the frame numbers.
+    """
+
+    def __init__(self, path, frames, padding):
+        self.path = path
+        self.frames = frames
+        self.padding = padding
+
+    @property
+    def is_sequence(self):
+        """
+        True if the output has a frame token.
+        """
+        return self.padding is not None
+
+    @property
+    def first_frame(self):
+        return self.frames[0] if self.frames else None
+
+    @property
+    def last_frame(self):
+        return self.frames[-1] if self.frames else None
+
+    @property
+    def missing_frames(self):
+        """
+        Sorted list of the frames missing between the first and last ones.
+        """
+        if not self.frames:
+            return []
+
+        found = set(self.frames)
+        return [
+            frame
+            for frame in range(self.first_frame, self.last_frame + 1)
+            if frame not in found
+        ]
+
+    def get_frame_path(self, frame):
+        """
+        Returns the path to the given frame.
+        """
+        if not self.is_sequence:
+            return self.path
+        return self.path % frame
+
+    @property
+    def frame_paths(self):
+        """
+        Paths to all the frames found.
+        """
+        return [self.get_frame_path(frame) for frame in self.frames]
+
+    def __repr__(self):
+        return "<ImageSequence %s: %s>" % (
+            self.path,
+            format_frame_ranges(self.frames),
+        )
+
+
+def format_frame_ranges(frames):
+    """
+    Returns a compact description of a list of frames,
+    ie. [1, 2, 3, 5, 8, 9] -> '1-3, 5, 8-9'
+    """
+    ranges = []
+    start = previous = None
+    for frame in sorted(frames):
+        if previous is not None and frame == previous + 1:
+            previous = frame
+            continue
+
+        if start is not None:
+            ranges.append((start, previous))
+        start = previous = frame
+
+    if start is not None:
+        ranges.append((start, previous))
+
+    return ", ".join(
+        str(first) if first == last else "%d-%d" % (first, last)
+        for (first, last) in ranges
+    )
+
+
+def _get_padding(path):
+    """
+    Returns the padding of the frame token of the given file name, or None if
+    it does not have one.
+    """
+    match = re.search(r"%0(\d+)d", path)
+    if match:
+        return int(match.group(1))
+    if "%d" in path:
+        return 1
+    return None
+
+
+# stands for the frame number in the keys the files are matched with
+FRAME_PLACEHOLDER = "\0"
+
+FRAME_TOKEN_REGEX = re.compile(r"%0(\d+)d|%d")
+DIGITS_REGEX = re.compile(r"\d+")
+
+
+def _name_key(name):
+    """
+    Returns the key the files of the given normalized file name are matched
+    with, the name with its frame tokens replaced by a placeholder.
+    """
+    key = FRAME_TOKEN_REGEX.sub(FRAME_PLACEHOLDER, name)
+    return key.lower() if os.name == "nt" else key
+
+
+def _file_keys(file_name):
+    """
+    Yields the keys a file could match, along with the frame number in each,
+    replacing each run of digits of the file name with the placeholder, and
+    all the runs with the same digits at once for names repeating the frame.
+    """
+    if os.name == "nt":
+        file_name = file_name.lower()
+
+    runs = list(DIGITS_REGEX.finditer(file_name))
+    for match in runs:
+        yield (
+            file_name[: match.start()]
+            + FRAME_PLACEHOLDER
+            + file_name[match.end() :],
+            match.group(),
+        )
+
+    repeated = set()
+    for match in runs:
+        digits = match.group()
+        if digits in repeated:
+            continue
+        repeated.add(digits)
+
+        same = [run for run in runs if run.group() == digits]
+        if len(same) > 1:
+            parts = []
+            position = 0
+            for run in same:
+                parts.append(file_name[position : run.start()])
+                position = run.end()
+            parts.append(file_name[position:])
+            yield (FRAME_PLACEHOLDER.join(parts), digits)
+
+
+def find_image_sequences(paths):
+    """
+    Finds the frames on disk for each of the given output paths.
+
+    The output folders are listed once each, no matter how many outputs
+    render into them, and each file is matched against all the outputs of
+    its folder with a few dictionary lookups, without a stat per frame.
+
+    :param paths: Iterable of paths to image outputs, with frame tokens like
+        ####, %04d or $F4.
+    :returns: Dictionary of path to :class:`ImageSequence`. Outputs without
+        files on disk have no frames.
+    """
+    by_folder = {}
+    for path in paths:
+        folder, name = os.path.split(path)
+        by_folder.setdefault(folder, []).append((path, name))
+
+    sequences = {}
+    for folder, outputs in by_folder.items():
+        # key -> sequences of the outputs with that name
+        by_key = {}
+        for (path, name) in outputs:
+            name = SEQUENCE_TOKEN_REGEX.sub(_normalize_token, name)
+            sequence = ImageSequence(
+                os.path.join(folder, name), [], _get_padding(name)
+            )
+            sequences[path] = sequence
+            by_key.setdefault(_name_key(name), []).append(sequence)
+
+        for file_name in list_files(folder):
+            # outputs without frame tokens
+            exact_name = file_name.lower() if os.name == "nt" else file_name
+            for sequence in by_key.get(exact_name, []):
+                if not sequence.is_sequence:
+                    sequence.frames.append(0)
+
+            for (key, digits) in _file_keys(file_name):
+                for sequence in by_key.get(key, []):
+                    if len(digits) >= sequence.padding:
+                        sequence.frames.append(int(digits))
+
+    for sequence in sequences.values():
+        sequence.frames.sort()
+
+    return sequences
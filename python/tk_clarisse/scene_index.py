@@ -0,0 +1,388 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Incremental index of the scene items that reference files on disk.
+"""
+
+import traceback
+from functools import wraps
+
+import ix
+
+from .scene_scan import (
+    scan_scene,
+    attr_key,
+    intern_path,
+    SceneFile,
+    FILE_CLASSES,
+    FILENAME_ATTR,
+    OUTPUT_CLASSES,
+)
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# scripting commands that create a single item and return it
+CREATE_COMMAND_NAMES = ("CreateObject",)
+
+# scripting commands that remove the items whose names are passed in
+DELETE_COMMAND_NAMES = ("DeleteItems", "DeleteItem")
+
+# scripting commands that change attribute values, the first argument is
+# the attribute path (or list of attribute paths)
+SET_VALUE_COMMAND_NAMES = ("SetValue", "SetValues")
+
+# scripting commands that can change the scene structure in ways we can not
+# follow item by item, ie. references being created or items being moved.
+# The index is rebuilt next time it is queried.
+STRUCTURE_COMMAND_NAMES = (
+    "CreateContext",
+    "CreateFileReference",
+    "CreateReference",
+    "MakeLocal",
+    "MoveItemsToContext",
+    "RenameItem",
+    "ImportProject",
+)
+
+
+def _to_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _item_name(item):
+    """
+    Returns the full name of an item, whether it is an item or already its
+    name.
+    """
+    if isinstance(item, basestring):
+        return item
+    return item.get_full_name()
+
+
+class SceneFileIndex(object):
+    """
+    Keeps track of every object with a file attribute and of every context
+    reference in the scene, and separately of the objects writing files, ie.
+    render outputs.
+
+    The index is built on demand the first time it is queried after being
+    invalidated (ie. after a project is loaded) and then kept up to date
+    incrementally by following the Clarisse scripting commands that create,
+    delete or change the filename of items, so that queries are answered
+    without traversing the scene again.
+
+    Note that edits done through the Clarisse UI do not go through the
+    python scripting commands and Clarisse does not notify them, so they are
+    only seen once the index is rebuilt, ie. from the Refresh Scene File
+    Index command of the engine menu, or after a project is loaded or reset.
+    """
+
+    def __init__(self, logger, file_classes=None, output_classes=None):
+        """
+        Constructor.
+
+        :param logger: Logger to report index activity to.
+        :param file_classes: Dictionary of class name to the list of names of
+            the attributes holding file paths. Defaults to the filename
+            attribute of the classes in FILE_CLASSES.
+        :param output_classes: Dictionary of class name to the list of names
+            of the attributes holding the paths of the files written.
+            Defaults to OUTPUT_CLASSES.
+        """
+        if file_classes is None:
+            file_classes = dict((c, [FILENAME_ATTR]) for c in FILE_CLASSES)
+        if output_classes is None:
+            output_classes = OUTPUT_CLASSES
+
+        self._logger = logger
+        self._file_classes = file_classes
+        self._output_classes = output_classes
+        # attribute full name -> SceneFile
+        self._files = {}
+        self._output_files = {}
+        self._dirty = True
+        self._wrapped_fns = {}
+
+        # names of all the attributes followed, to ignore the values set on
+        # any other attribute without looking up their item
+        self._attr_names = set([FILENAME_ATTR])
+        for classes in (file_classes, output_classes):
+            for attr_names in classes.values():
+                self._attr_names.update(attr_names)
+
+        # (class name, outputs) -> attribute names, as finding out the file
+        # classes an item is kind of goes through all of them
+        self._class_attr_names = {}
+
+    ###########################################################################
+    # queries
+
+    @property
+    def files(self):
+        """
+        List of :class:`SceneFile` for every item referencing a file.
+        """
+        self._ensure_built()
+        return list(self._files.values())
+
+    @property
+    def output_files(self):
+        """
+        List of :class:`SceneFile` for every item writing a file, ie. render
+        outputs. These are not part of :attr:`files`.
+        """
+        self._ensure_built()
+        return list(self._output_files.values())
+
+    @property
+    def paths(self):
+        """
+        Set of unique file paths referenced by the scene.
+        """
+        self._ensure_built()
+        return set(scene_file.path for scene_file in self._files.values())
+
+    @property
+    def is_dirty(self):
+        """
+        True if the index will be rebuilt the next time it is queried.
+        """
+        return self._dirty
+
+    ###########################################################################
+    # updates
+
+    def invalidate(self):
+        """
+        Marks the index to be rebuilt from scratch on the next query.
+        """
+        self._dirty = True
+
+    def rebuild(self):
+        """
+        Rebuilds the index traversing the whole scene.
+        """
+        # both kinds of classes are found in the same pass
+        scan_classes = dict(
+            (class_name, list(attr_names))
+            for (class_name, attr_names) in self._file_classes.items()
+        )
+        for class_name, attr_names in self._output_classes.items():
+            class_attrs = scan_classes.setdefault(class_name, [])
+            class_attrs.extend(a for a in attr_names if a not in class_attrs)
+
+        scan = scan_scene(scan_classes)
+
+        output_keys = set()
+        for class_name, attr_names in self._output_classes.items():
+            for obj in scan.objects_by_class[class_name]:
+                item_name = obj.get_full_name()
+                output_keys.update(attr_key(item_name, a) for a in attr_names)
+
+        self._files = {}
+        self._output_files = {}
+        for scene_file in scan.files:
+            if scene_file.key in output_keys:
+                self._output_files[scene_file.key] = scene_file
+            else:
+                self._files[scene_file.key] = scene_file
+
+        self._dirty = False
+        self._logger.debug(
+            "Scene file index rebuilt with %d items and %d outputs.",
+            len(self._files),
+            len(self._output_files),
+        )
+
+    def add_item(self, item):
+        """
+        Adds the given item to the index if it references a file.
+
+        :param item: Clarisse item (object or context).
+        """
+        if self._dirty:
+            return
+
+        item_name = item.get_full_name()
+        for (files, file_classes) in (
+            (self._files, self._file_classes),
+            (self._output_files, self._output_classes),
+        ):
+            for attr_name in self._get_file_attr_names(item, file_classes):
+                attr = item.get_attribute(attr_name)
+                if attr:
+                    scene_file = SceneFile(
+                        item_name, attr_name, attr.get_string()
+                    )
+                    files[scene_file.key] = scene_file
+
+    def remove_item(self, item):
+        """
+        Removes the given item, and anything below it if it is a context,
+        from the index.
+
+        :param item: Clarisse item or its full name.
+        """
+        if self._dirty:
+            return
+
+        name = _item_name(item)
+        attr_prefix = name + "."
+        context_prefix = name.rstrip("/") + "/"
+        for files in (self._files, self._output_files):
+            for key in list(files.keys()):
+                if key.startswith(attr_prefix) or key.startswith(
+                    context_prefix
+                ):
+                    del files[key]
+
+    def update_path(self, attr, path):
+        """
+        Records the new value of a file attribute.
+
+        :param attr: Clarisse attribute.
+        :param str path: New file path value.
+        """
+        if self._dirty:
+            return
+
+        item = attr.get_parent_object()
+        key = attr_key(item.get_full_name(), attr.get_name())
+        scene_file = self._files.get(key) or self._output_files.get(key)
+        if scene_file:
+            scene_file.path = intern_path(path)
+        else:
+            self.add_item(item)
+
+    def _ensure_built(self):
+        if self._dirty:
+            self.rebuild()
+
+    def _get_file_attr_names(self, item, file_classes=None):
+        """
+        Returns the names of the attributes of the given item that can hold
+        file paths, of the given classes or of the dependency ones.
+        """
+        if file_classes is None:
+            file_classes = self._file_classes
+
+        if item.is_context():
+            # references are dependencies
+            if file_classes is self._file_classes:
+                return [FILENAME_ATTR]
+            return []
+
+        class_name = item.get_class_name()
+        cache_key = (class_name, file_classes is self._output_classes)
+        if cache_key in self._class_attr_names:
+            return self._class_attr_names[cache_key]
+
+        attr_names = file_classes.get(class_name)
+        if attr_names is None:
+            attr_names = []
+            for candidate, candidate_attr_names in file_classes.items():
+                if item.is_kindof(candidate):
+                    attr_names = candidate_attr_names
+                    break
+
+        self._class_attr_names[cache_key] = attr_names
+        return attr_names
+
+    ###########################################################################
+    # scripting command tracking
+
+    def start_watching(self):
+        """
+        Starts following the Clarisse scripting commands that modify the
+        scene items.
+        """
+        self.stop_watching()
+
+        for command_name in CREATE_COMMAND_NAMES:
+            self._wrap_command(command_name, self._on_create)
+        for command_name in DELETE_COMMAND_NAMES:
+            self._wrap_command(command_name, self._on_delete)
+        for command_name in SET_VALUE_COMMAND_NAMES:
+            self._wrap_command(command_name, self._on_set_value)
+        for command_name in STRUCTURE_COMMAND_NAMES:
+            self._wrap_command(command_name, self._on_structure_change)
+
+    def stop_watching(self):
+        """
+        Stops following the Clarisse scripting commands.
+        """
+        for command_name, command_fn in self._wrapped_fns.items():
+            setattr(ix.cmds, command_name, command_fn._original)
+        self._wrapped_fns = {}
+
+    def _wrap_command(self, command_name, callback):
+        command_fn = getattr(ix.cmds, command_name, None)
+        if command_fn is None:
+            # not available in this version of Clarisse
+            return
+
+        @wraps(command_fn)
+        def wrapper(*args, **kwargs):
+            result = command_fn(*args, **kwargs)
+            try:
+                callback(result, *args, **kwargs)
+            except Exception:
+                # never let the index break a scene command, just start over
+                self._logger.debug(traceback.format_exc())
+                self.invalidate()
+            return result
+
+        wrapper._original = command_fn
+        self._wrapped_fns[command_name] = wrapper
+        setattr(ix.cmds, command_name, wrapper)
+
+    def _on_create(self, result, *args, **kwargs):
+        if result:
+            self.add_item(result)
+
+    def _on_delete(self, result, items, *args, **kwargs):
+        for item in _to_list(items):
+            self.remove_item(item)
+
+    def _on_set_value(self, result, attr_paths, *args, **kwargs):
+        if self._dirty:
+            return
+
+        for attr_path in _to_list(attr_paths):
+            attr_path = str(attr_path)
+            item_name, _, attr_name = attr_path.rpartition(".")
+            if attr_name not in self._attr_names:
+                continue
+
+            scene_file = self._files.get(attr_path) or self._output_files.get(
+                attr_path
+            )
+            if scene_file:
+                scene_file.path = intern_path(scene_file.attr.get_string())
+                continue
+
+            # it might be a new reference or an object that did not have
+            # a file path before, find out what it is
+            item = ix.item_exists(item_name)
+            if item and (
+                attr_name in self._get_file_attr_names(item)
+                or attr_name
+                in self._get_file_attr_names(item, self._output_classes)
+            ):
+                self.add_item(item)
+
+    def _on_structure_change(self, result, *args, **kwargs):
+        self.invalidate()
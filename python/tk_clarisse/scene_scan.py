@@ -0,0 +1,281 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Single pass scene traversal for Clarisse.
+
+Walks the project context tree once, bucketing every object by class and
+collecting the file paths stored in their file attributes, so hooks
+such as the breakdown and the publisher do not need to query the scene
+once per class.
+"""
+
+import ix
+
+try:
+    intern
+except NameError:
+    # python 3
+    from sys import intern
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# These classes contain a filename property which could contain
+# publishedFiles and could count as dependencies.
+#
+# The full list of classes with file attributes is discovered once per
+# Clarisse build (see file_classes.py), these are only used when that is not
+# possible.
+FILE_CLASSES = (
+    "GeometryPolyfile",
+    "GeometryFurFile",
+    "GeometryVolumeFile",
+    "GeometryBundleAlembic",
+    "GeometryBundleUsd",
+    "ProcessAlembicExport",
+    "LightPhysicalSphere",
+    "TextureMapFile",
+    "TextureStreamedMapFile",
+    "TextureOslFile",
+)
+
+FILENAME_ATTR = "filename"
+
+# classes with attributes holding the paths of the files they write, ie.
+# render outputs, which are not dependencies of the scene.
+OUTPUT_CLASSES = {"Image": ["save_as"]}
+
+
+def walk_contexts(context, prune=None):
+    """
+    Yields the given context and all its subcontexts, depth first and in the
+    same order as they are listed in Clarisse.
+
+    The traversal is iterative so it is not bound by the python recursion
+    limit, and lazy so callers can stop early.
+
+    :param context: Clarisse context to start from.
+    :param prune: Optional callable that receives each context and returns
+        True if its subcontexts should not be visited, ie. to skip the
+        contents of references. The context itself is still yielded.
+    """
+    stack = [context]
+    while stack:
+        context = stack.pop()
+        yield context
+
+        if prune is not None and prune(context):
+            continue
+
+        # push them reversed so they are popped in their natural order
+        subcontext_count = context.get_context_count()
+        for i in range(subcontext_count - 1, -1, -1):
+            stack.append(context.get_context(i))
+
+
+def is_reference(context):
+    """
+    Returns True if the given context is a reference to a file, useful as
+    prune callable for :func:`walk_contexts`.
+    """
+    return context.is_reference()
+
+
+def intern_path(path):
+    """
+    Returns the interned version of the given path, so that equal paths are
+    only stored once in memory.
+    """
+    try:
+        return intern(path)
+    except TypeError:
+        # unicode paths can not be interned in python 2
+        return path
+
+
+def attr_key(item_name, attr_name):
+    """
+    Returns the full name of the attribute of the given item.
+    """
+    return "%s.%s" % (item_name, attr_name)
+
+
+class SceneFile(object):
+    """
+    A file path found in a file attribute of a scene item.
+
+    Scans can hold tens of thousands of these, so they are kept compact:
+    only the names of the item and attribute are stored, the Clarisse
+    wrappers are resolved when accessed, and paths are interned so items
+    pointing to the same file share it.
+    """
+
+    __slots__ = ("item_name", "attr_name", "path")
+
+    def __init__(self, item_name, attr_name, path):
+        self.item_name = item_name
+        self.attr_name = attr_name
+        self.path = intern_path(path)
+
+    @property
+    def key(self):
+        """
+        Unique key of the attribute, ie. project://scene/map.filename
+        """
+        return attr_key(self.item_name, self.attr_name)
+
+    @property
+    def item(self):
+        """
+        The Clarisse item holding the attribute.
+        """
+        return ix.get_item(self.item_name)
+
+    @property
+    def attr(self):
+        """
+        The Clarisse attribute holding the path.
+        """
+        return self.item.get_attribute(self.attr_name)
+
+    def __repr__(self):
+        return "<SceneFile %s: %s>" % (self.key, self.path)
+
+
+class SceneScan(object):
+    """
+    Result of a single traversal of the Clarisse project.
+
+    - objects_by_class: dictionary of class name to the list of objects
+      found for each of the requested classes.
+    - contexts: all the contexts in the project, including the root one.
+    - object_files: :class:`SceneFile` for the objects with a filename.
+    - context_files: :class:`SceneFile` for the contexts with a filename,
+      ie. references.
+    """
+
+    def __init__(self):
+        self.objects_by_class = {}
+        self.contexts = []
+        self.object_files = []
+        self.context_files = []
+
+    @property
+    def files(self):
+        """
+        All the :class:`SceneFile` found, objects first then contexts.
+        """
+        return self.object_files + self.context_files
+
+    @property
+    def paths(self):
+        """
+        Set of unique file paths referenced by the scene.
+        """
+        return set(scene_file.path for scene_file in self.files)
+
+
+def _get_file_attribute(item, attr_name):
+    """
+    Returns the given file attribute and its value for the given item, or
+    (None, None) if the item does not have one.
+    """
+    attr = item.get_attribute(attr_name)
+    if not attr:
+        return None, None
+
+    return attr, attr.get_string()
+
+
+def _match_class(obj, class_name, file_classes):
+    """
+    Returns which of the file classes the given object is, or None if it is
+    not any of them.
+    """
+    if class_name in file_classes:
+        return class_name
+
+    for candidate in file_classes:
+        if obj.is_kindof(candidate):
+            return candidate
+
+    return None
+
+
+def scan_scene(file_classes=None, root="project:/", prune=None):
+    """
+    Walks the project a single time and returns a :class:`SceneScan` with
+    the objects of the given classes bucketed by class and every file path
+    found in their file attributes and in the contexts of the project.
+
+    Objects are matched the same way `get_matching_objects` does, including
+    objects whose class derives from one of the given classes. The class
+    check is only done once per distinct class name found in the scene.
+
+    :param file_classes: Dictionary of class name to the list of names of
+        the attributes holding file paths. Defaults to the filename
+        attribute of the classes in FILE_CLASSES.
+    :param root: Full name of the context to start the traversal from.
+    :param prune: Optional callable to skip the subcontexts of a context,
+        see :func:`walk_contexts`.
+    :returns: :class:`SceneScan` instance.
+    """
+    if file_classes is None:
+        file_classes = dict(
+            (class_name, [FILENAME_ATTR]) for class_name in FILE_CLASSES
+        )
+
+    scan = SceneScan()
+    for class_name in file_classes:
+        scan.objects_by_class[class_name] = []
+
+    # memoize the class each scene class name resolves to, most scenes have
+    # a large number of objects but a small number of different classes
+    class_matches = {}
+
+    for context in walk_contexts(ix.get_item(root), prune=prune):
+        scan.contexts.append(context)
+
+        attr, path = _get_file_attribute(context, FILENAME_ATTR)
+        if attr:
+            scan.context_files.append(
+                SceneFile(context.get_full_name(), FILENAME_ATTR, path)
+            )
+
+        object_count = context.get_object_count()
+        for i in range(object_count):
+            obj = context.get_object(i)
+
+            class_name = obj.get_class_name()
+            if class_name not in class_matches:
+                class_matches[class_name] = _match_class(
+                    obj, class_name, file_classes
+                )
+
+            match = class_matches[class_name]
+            if match is None:
+                continue
+
+            scan.objects_by_class[match].append(obj)
+
+            item_name = None
+            for attr_name in file_classes[match]:
+                attr, path = _get_file_attribute(obj, attr_name)
+                if attr:
+                    if item_name is None:
+                        item_name = obj.get_full_name()
+                    scan.object_files.append(
+                        SceneFile(item_name, attr_name, path)
+                    )
+
+    return scan
@@ -0,0 +1,166 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Batched update of the file attributes of the scene.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+import ix
+
+from tank import TankError
+
+from .file_sequences import is_sequence_path
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# number of threads used to check the existence of the new paths, this is
+# mostly network bound
+CHECK_THREAD_COUNT = 8
+
+
+@contextmanager
+def suspended_updates(name):
+    """
+    Applies all the changes done within the context as a single command,
+    with the application updates disabled, so Clarisse only re-evaluates
+    the scene once at the end.
+    """
+    ix.begin_command_batch(name)
+    ix.application.disable()
+
+    try:
+        yield
+    finally:
+        ix.application.enable()
+        ix.end_command_batch()
+
+
+def _path_exists(path):
+    """
+    Returns True if the given path exists on disk. For paths representing
+    several files (sequences, udims) only the folder is checked.
+    """
+    if is_sequence_path(path):
+        return os.path.isdir(os.path.dirname(path))
+    return os.path.exists(path)
+
+
+def _get_owner_context(attr):
+    """
+    Returns the context an attribute change will trigger a reload of, the
+    reference itself for context attributes, or the context holding the
+    object otherwise.
+    """
+    item = attr.get_parent_object()
+    if item.is_context():
+        return item
+    return item.get_context()
+
+
+def update_file_attributes(updates, logger, name="Update file paths"):
+    """
+    Sets new file paths on the given attributes.
+
+    All the new paths are checked up front in parallel, and no change is
+    made if any of them is missing. Changes are then grouped by the context
+    owning the attribute and all of them are applied in a single batch, so
+    each referenced context is reloaded once.
+
+    :param updates: List of (attribute, new path) tuples.
+    :param logger: Logger to report progress and timings to.
+    :param name: Name of the command batch, as shown in the undo history.
+    :returns: List of (context name, number of changes, seconds) tuples,
+        where the seconds only cover setting the paths, not the reloads
+        done once the batch is closed.
+    :raises: TankError if any of the new paths does not exist.
+    """
+    if not updates:
+        return []
+
+    # ---- check that all the new paths exist
+
+    start = time.time()
+    paths = sorted(set(path for (_, path) in updates))
+    pool = ThreadPool(min(CHECK_THREAD_COUNT, len(paths)))
+    try:
+        exists = pool.map(_path_exists, paths)
+    finally:
+        pool.close()
+        pool.join()
+
+    missing = [path for (path, found) in zip(paths, exists) if not found]
+    logger.debug(
+        "Checked %d paths on disk in %.3fs." % (len(paths), time.time() - start)
+    )
+    if missing:
+        raise TankError(
+            "Can not update the scene, these files do not exist:\n%s"
+            % "\n".join(missing)
+        )
+
+    # ---- group the changes by the context they will reload
+
+    groups = {}
+    for attr, path in updates:
+        context_name = _get_owner_context(attr).get_full_name()
+        groups.setdefault(context_name, []).append((attr, path))
+
+    # ---- apply them in a single batch
+
+    # the references are only reloaded when the batch is closed, so the time
+    # per group only covers setting the paths, the reload is timed apart
+    timings = []
+    batch_start = time.time()
+    with suspended_updates(name):
+        for context_name in sorted(groups):
+            group_start = time.time()
+
+            # objects first, so changing the filename of the reference
+            # itself, which reloads its contents, is done last
+            group = sorted(
+                groups[context_name],
+                key=lambda update: update[0].get_parent_object().is_context(),
+            )
+            for attr, path in group:
+                attr.set_string(path)
+
+            timings.append(
+                (context_name, len(group), time.time() - group_start)
+            )
+        set_seconds = time.time() - batch_start
+    total_seconds = time.time() - batch_start
+
+    for context_name, count, seconds in timings:
+        logger.debug(
+            "Set %d file paths in %s in %.3fs, not including the reload."
+            % (count, context_name, seconds)
+        )
+
+    logger.info(
+        "Updated %d file paths in %d contexts in %.3fs: %.3fs setting the "
+        "paths and %.3fs reloading the scene once the batch was closed."
+        % (
+            len(updates),
+            len(groups),
+            total_seconds,
+            set_seconds,
+            total_seconds - set_seconds,
+        )
+    )
+
+    return timings
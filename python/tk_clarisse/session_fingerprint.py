@@ -0,0 +1,183 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cheap fingerprints of the saved sessions, to find out if a session has
+changed since it was last published.
+"""
+
+import os
+import json
+import threading
+import traceback
+
+import ix
+
+from sgtk.util.filesystem import ensure_folder_exists
+
+from .session_io import file_checksum
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# renamed whenever the format changes, so older entries are not reused
+CACHE_FILE_NAME = "session_fingerprints_v2.json"
+
+# maximum number of files and publishes remembered
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def is_session_modified():
+    """
+    Returns True if the current session has unsaved changes, or if Clarisse
+    can not tell.
+    """
+    is_modified = getattr(ix.application, "is_project_modified", None)
+    if is_modified is None:
+        return True
+    return bool(is_modified())
+
+
+class SessionFingerprints(object):
+    """
+    Content checksums of session files, cached by path, modification time
+    and size so each file is only read once, and the publishes registered for
+    each checksum.
+    """
+
+    def __init__(self, cache_path, logger, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Constructor.
+
+        :param str cache_path: Path to the json file the fingerprints are
+            stored in.
+        :param logger: Logger to report to.
+        :param max_entries: Maximum number of files and publishes remembered.
+        """
+        self._cache_path = cache_path
+        self._logger = logger
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._files = {}
+        self._publishes = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as cache_file:
+                    cached = json.load(cache_file)
+                self._files = cached.get("files", {})
+                self._publishes = cached.get("publishes", {})
+            except Exception:
+                logger.debug(
+                    "Ignoring unreadable session fingerprints %s: %s"
+                    % (cache_path, traceback.format_exc())
+                )
+
+    @classmethod
+    def from_cache_folder(cls, cache_folder, logger, **kwargs):
+        """
+        Returns the fingerprints stored in the given folder, ie. the engine
+        cache location.
+        """
+        return cls(os.path.join(cache_folder, CACHE_FILE_NAME), logger, **kwargs)
+
+    def get_checksum(self, path):
+        """
+        Returns the checksum of the contents of the given file, reading it
+        only if it changed since it was last read.
+        """
+        key = _path_key(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            cached = self._files.get(key)
+            if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                return cached[2]
+
+        checksum = file_checksum(path)
+        with self._lock:
+            self._files[key] = [stat.st_mtime, stat.st_size, checksum]
+            _trim(self._files, self._max_entries)
+        self._save()
+        return checksum
+
+    def set_checksum(self, path, checksum):
+        """
+        Remembers the checksum of the contents of the given file, already
+        known, ie. computed while it was written, so it is not read again.
+        """
+        stat = os.stat(path)
+        with self._lock:
+            self._files[_path_key(path)] = [
+                stat.st_mtime,
+                stat.st_size,
+                checksum,
+            ]
+            _trim(self._files, self._max_entries)
+        self._save()
+
+    def get_publish(self, path, checksum):
+        """
+        Returns the publish registered for the given session file with the
+        given checksum, if any.
+
+        :returns: Entity dictionary with type, id and version_number, or None.
+        """
+        with self._lock:
+            return self._publishes.get(_publish_key(path, checksum))
+
+    def set_publish(self, path, checksum, sg_publish_data):
+        """
+        Remembers the publish registered for the given session file with the
+        given checksum.
+        """
+        with self._lock:
+            self._publishes[_publish_key(path, checksum)] = {
+                "type": sg_publish_data["type"],
+                "id": sg_publish_data["id"],
+                "version_number": sg_publish_data.get("version_number"),
+            }
+            _trim(self._publishes, self._max_entries)
+        self._save()
+
+    def _save(self):
+        with self._lock:
+            data = {"files": self._files, "publishes": self._publishes}
+        try:
+            ensure_folder_exists(os.path.dirname(self._cache_path))
+            with open(self._cache_path, "w") as cache_file:
+                json.dump(data, cache_file)
+        except Exception:
+            self._logger.debug(
+                "Could not write session fingerprints %s: %s"
+                % (self._cache_path, traceback.format_exc())
+            )
+
+
+def _path_key(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _publish_key(path, checksum):
+    """
+    Returns the key of the publish of a session file, the same contents saved
+    to another work area, ie. another shot, are not the same publish.
+    """
+    return "%s:%s" % (checksum, _path_key(path))
+
+
+def _trim(entries, max_entries):
+    """
+    Removes arbitrary entries above the maximum size.
+    """
+    for key in list(entries)[: max(0, len(entries) - max_entries)]:
+        del entries[key]
@@ -0,0 +1,313 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helpers to write the project files to network locations without freezing
+Clarisse while the data is transferred.
+"""
+
+import os
+import sys
+import time
+import uuid
+import ctypes
+import ctypes.util
+import hashlib
+import tempfile
+import threading
+
+import ix
+
+from tank import TankError
+from sgtk.util.filesystem import ensure_folder_exists
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# size of the blocks read and written when streaming files
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# ioctl request to clone a file on linux file systems that support it
+FICLONE = 0x40049409
+
+# ways a file can be copied, see copy_file
+COPY_REFLINK = "reflink"
+COPY_HARDLINK = "hardlink"
+COPY_STREAM = "stream"
+
+
+def get_scratch_path(path):
+    """
+    Returns a unique path in the local temporary folder for the given file.
+    """
+    scratch_folder = os.path.join(tempfile.gettempdir(), "tk-clarisse")
+    ensure_folder_exists(scratch_folder)
+    return os.path.join(
+        scratch_folder, "%s_%s" % (uuid.uuid4().hex, os.path.basename(path))
+    )
+
+
+def file_checksum(path):
+    """
+    Returns the sha1 hex digest of the contents of a file, read in chunks.
+    """
+    checksum = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def atomic_replace(source, destination):
+    """
+    Renames source to destination, replacing it if it exists.
+    """
+    replace = getattr(os, "replace", None)
+    if replace is not None:
+        replace(source, destination)
+    elif os.name == "nt" and os.path.exists(destination):
+        # python 2 on windows can not rename over an existing file
+        os.remove(destination)
+        os.rename(source, destination)
+    else:
+        os.rename(source, destination)
+
+
+def _remove(path):
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+def reflink(source, destination):
+    """
+    Clones source into destination sharing the data blocks, on file systems
+    that support it (btrfs, xfs, apfs...).
+
+    :returns: True if the file was cloned, False if not supported.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            import fcntl
+
+            with open(source, "rb") as source_file:
+                with open(destination, "wb") as destination_file:
+                    fcntl.ioctl(
+                        destination_file.fileno(), FICLONE, source_file.fileno()
+                    )
+            return True
+
+        if sys.platform == "darwin":
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            clonefile = getattr(libc, "clonefile", None)
+            if clonefile and clonefile(
+                source.encode("utf-8"), destination.encode("utf-8"), 0
+            ) == 0:
+                return True
+    except (IOError, OSError):
+        pass
+
+    _remove(destination)
+    return False
+
+
+def stream_copy(source, destination, resume=False):
+    """
+    Copies source to destination in chunks, flushing the data to disk.
+
+    :param resume: If True and destination holds the beginning of a previous
+        interrupted copy, only the remaining data is written.
+    :returns: Tuple of (sha1 hex digest of the source, bytes written).
+    """
+    offset = 0
+    if resume and os.path.exists(destination):
+        offset = os.path.getsize(destination)
+        if offset > os.path.getsize(source):
+            offset = 0
+
+    checksum = hashlib.sha1()
+    written = 0
+    with open(source, "rb") as source_file:
+        with open(destination, "r+b" if offset else "wb") as destination_file:
+            # the data already copied still goes into the checksum
+            remaining = offset
+            while remaining:
+                chunk = source_file.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                checksum.update(chunk)
+                remaining -= len(chunk)
+
+            destination_file.seek(offset)
+            destination_file.truncate()
+            while True:
+                chunk = source_file.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                checksum.update(chunk)
+                destination_file.write(chunk)
+                written += len(chunk)
+            destination_file.flush()
+            os.fsync(destination_file.fileno())
+
+    return (checksum.hexdigest(), written)
+
+
+def copy_file(source, destination, allow_hardlink=False):
+    """
+    Copies source to destination using the cheapest strategy available:
+    a reflink, then a hardlink if allowed, then a chunked streaming copy that
+    resumes a previous interrupted one and is verified by checksum.
+
+    The destination is always replaced atomically.
+
+    Hardlinks share the data with the source, so they should only be allowed
+    when neither file is going to be modified in place afterwards.
+
+    :returns: Tuple of (strategy, size, seconds), where strategy is one of
+        COPY_REFLINK, COPY_HARDLINK or COPY_STREAM.
+    """
+    start = time.time()
+    ensure_folder_exists(os.path.dirname(destination))
+    size = os.path.getsize(source)
+
+    temp_path = "%s.%s.part" % (destination, uuid.uuid4().hex)
+    try:
+        if reflink(source, temp_path):
+            atomic_replace(temp_path, destination)
+            return (COPY_REFLINK, size, time.time() - start)
+
+        if allow_hardlink and hasattr(os, "link"):
+            try:
+                os.link(source, temp_path)
+                atomic_replace(temp_path, destination)
+                return (COPY_HARDLINK, size, time.time() - start)
+            except OSError:
+                _remove(temp_path)
+    finally:
+        _remove(temp_path)
+
+    # a fixed name so an interrupted copy can be picked up next time
+    resume_path = "%s.part" % destination
+    (checksum, _) = stream_copy(source, resume_path, resume=True)
+    if file_checksum(resume_path) != checksum:
+        # what was there to resume from is not a copy of this file
+        (checksum, _) = stream_copy(source, resume_path)
+        if file_checksum(resume_path) != checksum:
+            _remove(resume_path)
+            raise IOError("Checksum mismatch after copying the file.")
+
+    atomic_replace(resume_path, destination)
+    return (COPY_STREAM, size, time.time() - start)
+
+
+class BackgroundCopy(object):
+    """
+    Copies a file to its destination in a background thread, see copy_file.
+
+    The destination is only replaced once the copy is complete and verified,
+    so it is never left half written.
+    """
+
+    def __init__(
+        self, source, destination, logger, remove_source=True, checksum=False
+    ):
+        """
+        Constructor.
+
+        :param str source: Path to the file to copy.
+        :param str destination: Path to copy the file to.
+        :param logger: Logger to report to.
+        :param remove_source: If True, the source file is deleted once copied.
+        :param checksum: If True, the checksum of the file is computed in the
+            background as well, from the source, see the checksum attribute.
+        """
+        self.source = source
+        self.destination = destination
+        self.strategy = None
+        self.size = 0
+        self.seconds = 0.0
+        self.error = None
+        self.checksum = None
+
+        self._logger = logger
+        self._remove_source = remove_source
+        self._compute_checksum = checksum
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    @property
+    def throughput(self):
+        """
+        Megabytes per second the file was copied at.
+        """
+        if not self.seconds:
+            return 0.0
+        return self.size / (1024.0 * 1024.0) / self.seconds
+
+    def start(self):
+        """
+        Starts copying the file.
+        """
+        self._logger.debug(
+            "Copying %s to %s in the background..."
+            % (self.source, self.destination)
+        )
+        self._thread.start()
+        return self
+
+    def wait(self):
+        """
+        Waits for the copy to finish, keeping Clarisse responsive meanwhile.
+
+        :raises: TankError if the copy failed.
+        """
+        while self._thread.is_alive():
+            self._thread.join(0.1)
+            ix.application.check_for_events()
+
+        if self.error:
+            raise TankError(
+                "Could not copy %s to %s: %s"
+                % (self.source, self.destination, self.error)
+            )
+
+        self._logger.info(
+            "Copied %s using %s (%.1f MB) in %.2fs, %.1f MB/s."
+            % (
+                self.destination,
+                self.strategy,
+                self.size / (1024.0 * 1024.0),
+                self.seconds,
+                self.throughput,
+            )
+        )
+
+    def _run(self):
+        start = time.time()
+        try:
+            self._copy()
+        except Exception as e:
+            self.error = e
+        self.seconds = time.time() - start
+
+    def _copy(self):
+        # from the source, which is meant to be local, before it is removed
+        if self._compute_checksum:
+            self.checksum = file_checksum(self.source)
+
+        (self.strategy, self.size, _) = copy_file(self.source, self.destination)
+
+        if self._remove_source:
+            os.remove(self.source)
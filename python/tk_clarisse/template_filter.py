@@ -0,0 +1,133 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Fast matching of file paths against the templates of a pipeline
+configuration.
+"""
+
+import re
+import sys
+
+import sgtk
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+# splits a template definition into keys, optional section markers and the
+# static text in between
+DEFINITION_TOKEN_REGEX = re.compile(r"(\{[^}]*\}|\[|\])")
+
+
+def _normalize(path):
+    return path.replace("\\", "/").rstrip("/")
+
+
+def _definition_to_regex(definition):
+    """
+    Converts a template definition into a regular expression, where each key
+    matches anything but a path separator. Sequence and udim tokens in the
+    paths are matched by the keys too.
+    """
+    parts = []
+    for token in DEFINITION_TOKEN_REGEX.split(definition):
+        if not token:
+            continue
+        if token.startswith("{"):
+            parts.append("[^/]*")
+        elif token == "[":
+            parts.append("(?:")
+        elif token == "]":
+            parts.append(")?")
+        else:
+            parts.append(re.escape(token.replace("\\", "/")))
+
+    return "".join(parts)
+
+
+class TemplatePathFilter(object):
+    """
+    Filters file paths, keeping the ones that match any of the path
+    templates of a pipeline configuration.
+
+    All the templates are compiled into a single regular expression, so
+    each path is matched against all of them in a single pass.
+    """
+
+    def __init__(self, templates):
+        """
+        Constructor.
+
+        :param templates: Iterable of :class:`sgtk.TemplatePath`. Other kinds
+            of templates are ignored.
+        """
+        patterns = set()
+        for template in templates:
+            if not isinstance(template, sgtk.TemplatePath):
+                continue
+
+            root = _normalize(template.root_path)
+            definition = template.definition.lstrip("/")
+            patterns.add(
+                re.escape(root) + "/" + _definition_to_regex(definition)
+            )
+
+        flags = 0
+        if sys.platform == "win32":
+            flags |= re.IGNORECASE
+
+        self._template_count = len(patterns)
+        if patterns:
+            # longest first, so the most specific templates are tried first
+            patterns = sorted(patterns, key=len, reverse=True)
+            self._regex = re.compile(
+                r"(?:%s)\Z" % "|".join(patterns), flags
+            )
+        else:
+            self._regex = None
+
+    @classmethod
+    def from_sgtk(cls, tk):
+        """
+        Builds a filter for all the templates of the given toolkit instance.
+
+        :param tk: :class:`sgtk.Sgtk` instance.
+        """
+        return cls(tk.templates.values())
+
+    @property
+    def template_count(self):
+        """
+        Number of distinct path templates the filter matches against.
+        """
+        return self._template_count
+
+    def matches(self, path):
+        """
+        Returns True if the given path matches any of the templates.
+        """
+        if self._regex is None:
+            return False
+        return self._regex.match(_normalize(path)) is not None
+
+    def filter(self, paths):
+        """
+        Returns the paths matching any of the templates, in the same order.
+
+        :param paths: Iterable of paths.
+        :returns: List of paths.
+        """
+        if self._regex is None:
+            return []
+
+        match = self._regex.match
+        return [path for path in paths if match(_normalize(path))]
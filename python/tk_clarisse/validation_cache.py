@@ -0,0 +1,91 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache of the results of the publish plugins checks on the current session.
+"""
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def freeze(value):
+    """
+    Returns a hashable representation of the given value, used to build the
+    cache keys. Publish settings are represented by their values and
+    templates by their definitions, so changing either gives a new key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for (k, v) in value.items()))
+
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(v) for v in value)
+
+    # publish2 settings
+    if hasattr(value, "value") and hasattr(value, "type"):
+        return freeze(value.value)
+
+    # templates
+    definition = getattr(value, "definition", None)
+    if definition is not None:
+        return (value.__class__.__name__, definition)
+
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ValidationCache(object):
+    """
+    Results of the accept and validate checks of the publish plugins, kept
+    until the session is saved, loaded or reset.
+
+    The keys include everything a check depends on apart from the session
+    itself, ie. the session path, the plugin settings and the templates, so
+    those changing gives a new entry instead of a stale one.
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self._results = {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, key):
+        return key in self._results
+
+    def key(self, *parts):
+        """
+        Returns the cache key for the given parts.
+        """
+        return freeze(parts)
+
+    def get(self, key, default=None):
+        """
+        Returns the result cached for the given key.
+        """
+        return self._results.get(key, default)
+
+    def set(self, key, result):
+        """
+        Caches the result for the given key.
+        """
+        self._results[key] = result
+
+    def invalidate(self):
+        """
+        Forgets all the cached results.
+        """
+        self._results.clear()
@@ -0,0 +1,165 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Discovery of the versions of a work file from a single folder listing.
+"""
+
+import os
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # python 2, with the backport installed
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def list_files(folder):
+    """
+    Returns the names of the files in the given folder, without doing a stat
+    per file.
+
+    Without scandir, ie. python 2 without the backport, the names of the
+    subfolders are returned as well, as telling them apart would need a stat
+    per entry. Callers match the names against templates or patterns of
+    files anyway.
+
+    :param str folder: Folder to list.
+    :returns: List of file names, empty if the folder does not exist.
+    """
+    try:
+        if scandir is None:
+            return os.listdir(folder)
+
+        return [entry.name for entry in scandir(folder) if entry.is_file()]
+    except OSError:
+        return []
+
+
+def _fields_key(fields):
+    """
+    Returns a hashable key for the fields of a work file, ignoring the
+    version.
+    """
+    return tuple(
+        sorted((k, v) for (k, v) in fields.items() if k != "version")
+    )
+
+
+class WorkFileVersions(object):
+    """
+    Index of the files in a work folder and of the versions of each work file
+    found in it, built from a single listing of the folder so that questions
+    like "what is the next free version" do not need to go to the file system
+    again.
+
+    The folder is only listed, and the names parsed with the work template,
+    the first time the versions are asked for. Until then, checking if a path
+    exists is a single stat.
+    """
+
+    def __init__(self, path, work_template=None):
+        """
+        Constructor.
+
+        :param str path: Path to a file in the work folder to index.
+        :param work_template: Optional work template, used to find the
+            versions of the work files.
+        """
+        self._folder = os.path.dirname(path)
+        self._work_template = work_template
+
+        # set when the folder is listed
+        self._names = None
+        # fields without version -> set of versions
+        self._versions = None
+
+    def exists(self, path):
+        """
+        Returns True if the given path exists. Paths in the indexed folder
+        are answered from the listing, once the folder has been listed.
+        """
+        folder, name = os.path.split(path)
+        if self._names is None or os.path.normcase(folder) != os.path.normcase(
+            self._folder
+        ):
+            return os.path.exists(path)
+        return os.path.normcase(name) in self._names
+
+    def get_versions(self, path):
+        """
+        Returns the versions found for the work file the given path is a
+        version of, according to the work template.
+
+        :returns: Set of version numbers.
+        """
+        if not self._work_template or not self._work_template.validate(path):
+            return set()
+
+        fields = self._work_template.get_fields(path)
+        return self._get_versions().get(_fields_key(fields), set())
+
+    def get_next_free_version(self, path):
+        """
+        Returns the path and number of the first version after the given one
+        that does not exist yet.
+
+        :param str path: Path to a version of a work file, it needs to match
+            the work template.
+        :returns: Tuple of (path, version), or (None, None) if the path does
+            not match the work template.
+        """
+        if not self._work_template or not self._work_template.validate(path):
+            return (None, None)
+
+        fields = self._work_template.get_fields(path)
+        if "version" not in fields:
+            return (None, None)
+
+        versions = self._get_versions().get(_fields_key(fields), set())
+        version = fields["version"] + 1
+        while version in versions:
+            version += 1
+
+        fields["version"] = version
+        return (self._work_template.apply_fields(fields), version)
+
+    def _get_versions(self):
+        """
+        Lists the folder and finds the versions of the work files in it, the
+        first time it is called.
+        """
+        if self._versions is not None:
+            return self._versions
+
+        names = list_files(self._folder)
+        self._names = set(os.path.normcase(name) for name in names)
+
+        self._versions = {}
+        if self._work_template:
+            for name in names:
+                file_path = os.path.join(self._folder, name)
+                if not self._work_template.validate(file_path):
+                    continue
+
+                fields = self._work_template.get_fields(file_path)
+                if "version" in fields:
+                    self._versions.setdefault(
+                        _fields_key(fields), set()
+                    ).add(fields["version"])
+
+        return self._versions
@@ -14,8 +14,19 @@ It sets up the Toolkit context and prepares the tk-clarisse engine.
 """
 
 import os
+import gzip
+import atexit
+import shutil
+import logging
+import threading
 from contextlib import contextmanager
 
+try:
+    import queue
+except ImportError:
+    # python 2
+    import Queue as queue
+
 import ix
 
 
@@ -23,6 +34,183 @@ __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 
+# log file rotation, overridable through the environment
+LOG_MAX_BYTES = int(os.environ.get("TK_CLARISSE_LOG_MAX_BYTES", 5242880))
+LOG_BACKUP_COUNT = int(os.environ.get("TK_CLARISSE_LOG_BACKUP_COUNT", 3))
+LOG_COMPRESS = os.environ.get("TK_CLARISSE_LOG_COMPRESS", "0") == "1"
+
+# records waiting to be written before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
+# same format as the toolkit base file handler
+LOG_FORMAT = "%(asctime)s [%(process) 5d %(levelname)s %(name)s] %(message)s"
+
+
+class AsyncRotatingFileHandler(logging.Handler):
+    """
+    Log handler writing to a file from a background thread, so the thread
+    emitting the records, ie. Clarisse's main thread, never waits on the disk.
+
+    The file is rotated when it grows over max_bytes, keeping backup_count
+    rotated files, optionally gzipped. Records are dropped and counted when
+    more than queue_size of them are waiting to be written.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        compress=LOG_COMPRESS,
+        queue_size=LOG_QUEUE_SIZE,
+    ):
+        logging.Handler.__init__(self)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.dropped = 0
+
+        self._queue = queue.Queue(queue_size)
+        self._stream = None
+        self._writer = threading.Thread(target=self._write_records)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def emit(self, record):
+        try:
+            # formatted here, as the record arguments may change afterwards
+            self._queue.put_nowait(self.format(record) + "\n")
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(5)
+        logging.Handler.close(self)
+
+    def _write_records(self):
+        while True:
+            text = self._queue.get()
+            if text is None:
+                break
+
+            lines = [text]
+            # write everything waiting at once
+            while len(lines) < 1000:
+                try:
+                    text = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if text is None:
+                    break
+                lines.append(text)
+
+            try:
+                self._write("".join(lines))
+            except Exception:
+                # nowhere left to report to
+                pass
+
+            if text is None:
+                break
+
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    def _write(self, text):
+        # emit() counts the dropped records holding the handler lock
+        with self.lock:
+            (dropped, self.dropped) = (self.dropped, 0)
+        if dropped:
+            text = "[%d log records dropped]\n%s" % (dropped, text)
+
+        if self._stream is None:
+            self._stream = open(self.path, "a")
+        elif self.max_bytes and self._stream.tell() >= self.max_bytes:
+            self._stream.close()
+            self._rotate()
+            self._stream = open(self.path, "a")
+
+        self._stream.write(text)
+        self._stream.flush()
+
+    def _rotate(self):
+        """
+        Moves the log file to .1, shifting the older ones, and compresses it
+        if needed.
+        """
+        suffix = ".gz" if self.compress else ""
+        for index in range(self.backup_count - 1, 0, -1):
+            source = "%s.%d%s" % (self.path, index, suffix)
+            if os.path.exists(source):
+                destination = "%s.%d%s" % (self.path, index + 1, suffix)
+                if os.path.exists(destination):
+                    os.remove(destination)
+                os.rename(source, destination)
+
+        if not self.backup_count:
+            os.remove(self.path)
+            return
+
+        destination = "%s.1" % self.path
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.rename(self.path, destination)
+
+        if self.compress:
+            with open(destination, "rb") as source_file:
+                with gzip.open(destination + ".gz", "wb") as gzip_file:
+                    shutil.copyfileobj(source_file, gzip_file)
+            os.remove(destination)
+
+
+class GlobalDebugFilter(logging.Filter):
+    """
+    Lets debug records through only while toolkit global debug logging is
+    on, the same levels the toolkit base file handler writes, following it
+    whenever it is toggled.
+    """
+
+    def __init__(self, log_manager):
+        logging.Filter.__init__(self)
+        self._log_manager = log_manager
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self._log_manager.global_debug
+
+
+def initialize_log_file_handler(log_name):
+    """
+    Writes the toolkit logs to a file in the toolkit log folder, from a
+    background thread, instead of the base file handler writing them from the
+    thread emitting each record.
+
+    :param str log_name: Name of the log file, without extension.
+    :returns: The :class:`AsyncRotatingFileHandler` created.
+    """
+    import sgtk
+    from sgtk.util.filesystem import ensure_folder_exists
+
+    log_manager = sgtk.LogManager()
+    ensure_folder_exists(log_manager.log_folder)
+    handler = AsyncRotatingFileHandler(
+        os.path.join(log_manager.log_folder, "%s.log" % log_name)
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(GlobalDebugFilter(log_manager))
+    log_manager.root_logger.addHandler(handler)
+
+    # write out what is still queued when Clarisse exits
+    atexit.register(handler.close)
+
+    return handler
+
+
 @contextmanager
 def disabled_updates():
     """
@@ -113,8 +301,8 @@ def start_toolkit():
         display_error(msg)
         return
 
-    # start up toolkit logging to file
-    sgtk.LogManager().initialize_base_file_handler("tk-clarisse")
+    # start up toolkit logging to file, without blocking Clarisse
+    initialize_log_file_handler("tk-clarisse")
 
     # Rely on the classic boostrapping method
     start_toolkit_classic()